@@ -0,0 +1,278 @@
+import random
+import threading
+from array import array
+from typing import Optional
+
+from corpus import WordCorpus
+
+ADAPTIVE_SHARE = 0.7
+ERROR_WEIGHT = 2.0
+MIN_ATTEMPTS = 3
+
+
+def bigram_scores(stats: dict[str, tuple[int, float, int]], baseline_ms: float) -> dict[str, float]:
+    """
+    Scores how much practice every bigram needs from the user's running bigram totals.
+
+    A bigram scores by how much slower than the baseline it is typed on average, plus
+    ERROR_WEIGHT times its error rate. Bigrams typed at or below the baseline without
+    errors, and bigrams with fewer than MIN_ATTEMPTS attempts, score 0.
+
+    :param stats: (correctly typed count, total latency in milliseconds, errors) per bigram.
+    :type stats: dict[str, tuple[int, float, int]]
+    :param baseline_ms: The user's typical latency between two keystrokes, in milliseconds.
+    :type baseline_ms: float
+    :return: A score of 0 or more per bigram.
+    :rtype: dict[str, float]
+    """
+    scores = {}
+    for bigram, (count, total_ms, errors) in stats.items():
+        attempts = count + errors
+        if attempts < MIN_ATTEMPTS:
+            continue
+        slowness = max(0.0, total_ms / count / baseline_ms - 1) if count and baseline_ms > 0 else 0.0
+        score = slowness + ERROR_WEIGHT * errors / attempts
+        if score > 0:
+            scores[bigram] = score
+    return scores
+
+
+def baseline_latency(stats: dict[str, tuple[int, float, int]]) -> float:
+    """
+    :param stats: (correctly typed count, total latency in milliseconds, errors) per bigram.
+    :type stats: dict[str, tuple[int, float, int]]
+    :return: The mean latency over all bigrams, in milliseconds, or 0 without data.
+    :rtype: float
+    """
+    count = sum(count for count, _, _ in stats.values())
+    return sum(total_ms for _, total_ms, _ in stats.values()) / count if count else 0.0
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over non-negative weights, supporting weight updates and
+    sampling an index proportionally to its weight in O(log n) each.
+
+    :ivar weights: Current weight of every index.
+    :type weights: array.array
+    """
+
+    def __init__(self, size: int) -> None:
+        self.weights = array("d", bytes(8 * size))
+        self._tree = array("d", bytes(8 * (size + 1)))
+        self._top = 1 << size.bit_length() if size else 0
+
+    @property
+    def total(self) -> float:
+        return self.prefix_sum(len(self.weights))
+
+    def prefix_sum(self, count: int) -> float:
+        """
+        :param count: Number of leading indices to sum.
+        :type count: int
+        :return: Sum of the weights of the first `count` indices.
+        :rtype: float
+        """
+        total = 0.0
+        while count > 0:
+            total += self._tree[count]
+            count &= count - 1
+        return total
+
+    def set(self, index: int, weight: float) -> None:
+        """
+        :param index: Index to update.
+        :type index: int
+        :param weight: New weight of the index.
+        :type weight: float
+        :return: None
+        """
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        position = index + 1
+        while position < len(self._tree):
+            self._tree[position] += delta
+            position += position & -position
+
+    def find(self, value: float) -> int:
+        """
+        Returns the index whose cumulative weight range contains the value.
+
+        :param value: A value between 0 and `total`.
+        :type value: float
+        :return: The smallest index whose prefix sum including itself exceeds the value.
+        :rtype: int
+        """
+        position = 0
+        step = self._top
+        while step:
+            following = position + step
+            if following < len(self._tree) and self._tree[following] <= value:
+                position = following
+                value -= self._tree[following]
+            step >>= 1
+        return min(position, len(self.weights) - 1)
+
+
+def index_bigrams(corpus: WordCorpus) -> tuple[dict[str, int], list[array]]:
+    """
+    Builds an inverted index from every bigram to the words containing it.
+
+    :param corpus: An indexed corpus.
+    :type corpus: WordCorpus
+    :return: The id of every bigram, and the ids of the words containing each bigram by bigram id.
+    :rtype: tuple[dict[str, int], list[array.array]]
+    """
+    bigram_ids: dict[str, int] = {}
+    postings: list[array] = []
+    for word_id in range(len(corpus.starts)):
+        word = corpus.word(word_id)
+        for bigram in {word[index:index + 2] for index in range(len(word) - 1)}:
+            bigram_id = bigram_ids.get(bigram)
+            if bigram_id is None:
+                bigram_id = bigram_ids[bigram] = len(postings)
+                postings.append(array("I"))
+            postings[bigram_id].append(word_id)
+    return bigram_ids, postings
+
+
+class AdaptiveSampler:
+    """
+    Draws practice words weighted towards the bigrams the user types slowly or
+    mistypes often.
+
+    An inverted index mapping every bigram to the words containing it is built over
+    the corpus on a background thread, started on first use and whenever the corpus
+    changes on disk, since it takes seconds for corpora of a million words; until
+    it is ready, words are drawn uniformly so the caller never waits. A share of ADAPTIVE_SHARE of the words is then drawn by
+    picking a bigram proportionally to its score from a Fenwick tree, followed by a
+    uniformly random word containing it; the rest is drawn uniformly from the whole
+    corpus, so the tests keep some variety. Updating the scores only touches the
+    Fenwick tree entries of the bigrams that changed, and drawing a word costs
+    O(log b) for b bigrams, independently of the corpus size.
+
+    :ivar corpus: The words to draw from.
+    :type corpus: WordCorpus
+    :ivar scores: Current practice score of every bigram.
+    :type scores: dict[str, float]
+    """
+
+    def __init__(self, corpus: WordCorpus) -> None:
+        self.corpus = corpus
+        self.scores: dict[str, float] = {}
+        self._signature = None
+        self._bigram_ids: dict[str, int] = {}
+        self._postings: list[array] = []
+        self._tree: Optional[FenwickTree] = None
+        self._lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the index is built for the current version of the corpus.
+        """
+        return self._tree is not None and self._signature == self.corpus.signature
+
+    @property
+    def bigrams(self) -> list[str]:
+        """
+        The bigrams of the indexed words, empty before the index is built.
+        """
+        return list(self._bigram_ids)
+
+    def build_index(self) -> None:
+        """
+        Builds the bigram-to-words inverted index over the corpus on the calling thread
+        and re-applies the current scores.
+
+        :return: None
+        """
+        self.corpus.refresh()
+        self._install(self.corpus.signature, *index_bigrams(self.corpus))
+
+    def build_in_background(self) -> None:
+        """
+        Starts building the index on a background thread, unless a build is running.
+        The thread reads the word list through its own WordCorpus, so the corpus can
+        keep being used meanwhile.
+
+        :return: None
+        """
+        if self._builder is not None and self._builder.is_alive():
+            return
+        self._builder = threading.Thread(target=self._build_copy, name="AdaptiveSampler index", daemon=True)
+        self._builder.start()
+
+    def update(self, scores: dict[str, float]) -> None:
+        """
+        Replaces the practice scores. Only bigrams whose score changed are updated.
+
+        :param scores: The new score of every bigram; missing bigrams score 0.
+        :type scores: dict[str, float]
+        :return: None
+        """
+        changed = {bigram: score for bigram, score in scores.items() if self.scores.get(bigram) != score}
+        changed.update({bigram: 0.0 for bigram in self.scores if bigram not in scores})
+        with self._lock:
+            self.scores = dict(scores)
+            if self._tree is not None:
+                for bigram, score in changed.items():
+                    self._set_score(bigram, score)
+
+    def sample(self, k: int) -> list[str]:
+        """
+        Returns k distinct words, weighted towards the highest scoring bigrams once the
+        index is ready, or drawn uniformly while it is being built.
+
+        :param k: Number of words to draw.
+        :type k: int
+        :raises ValueError: If k is larger than the number of words in the corpus.
+        :return: A list of k words.
+        :rtype: list[str]
+        """
+        self.corpus.refresh()
+        if not self.ready:
+            self.build_in_background()
+            return self.corpus.sample(k)
+        size = len(self.corpus.starts)
+        if k > size:
+            raise ValueError("Sample larger than population")
+        with self._lock:
+            total = self._tree.total
+            chosen: dict[int, None] = {}
+            while len(chosen) < k:
+                if total > 0 and random.random() < ADAPTIVE_SHARE:
+                    posting = self._postings[self._tree.find(random.random() * total)]
+                    word_id = posting[random.randrange(len(posting))]
+                else:
+                    word_id = random.randrange(size)
+                chosen[word_id] = None
+        words = [self.corpus.word(word_id) for word_id in chosen]
+        random.shuffle(words)
+        return words
+
+    def _build_copy(self) -> None:
+        corpus = WordCorpus(self.corpus.path)
+        try:
+            corpus.refresh()
+            self._install(corpus.signature, *index_bigrams(corpus))
+        except OSError:
+            pass
+        finally:
+            corpus.close()
+
+    def _install(self, signature: tuple[int, int], bigram_ids: dict[str, int], postings: list[array]) -> None:
+        tree = FenwickTree(len(postings))
+        with self._lock:
+            self._bigram_ids = bigram_ids
+            self._postings = postings
+            self._tree = tree
+            for bigram, score in self.scores.items():
+                self._set_score(bigram, score)
+            self._signature = signature
+
+    def _set_score(self, bigram: str, score: float) -> None:
+        bigram_id = self._bigram_ids.get(bigram)
+        if bigram_id is not None:
+            self._tree.set(bigram_id, score)
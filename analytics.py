@@ -0,0 +1,230 @@
+import json
+import statistics
+from typing import NamedTuple
+
+from session import CORRECTION, KeystrokeLog
+
+BURST_WINDOW = 10
+CHARS_PER_WORD = 5
+
+
+class KeystrokeAnalysis(NamedTuple):
+    """
+    Per-keystroke statistics of a completed typing test.
+
+    :ivar keystrokes: Number of typed characters, corrections excluded.
+    :type keystrokes: int
+    :ivar corrections: Number of deleted characters.
+    :type corrections: int
+    :ivar accuracy: Share of typed characters that matched the expected character, from 0 to 1.
+    :type accuracy: float
+    :ivar mean_interval_ms: Mean time between consecutive typed characters, in milliseconds.
+    :type mean_interval_ms: float
+    :ivar burst_wpm: Best speed over any BURST_WINDOW consecutive typed characters, in
+        words of CHARS_PER_WORD characters per minute.
+    :type burst_wpm: float
+    :ivar consistency: How even the rhythm was, from 0 to 100 (100 minus the coefficient
+        of variation of the intervals, in percent).
+    :type consistency: float
+    :ivar bigram_latency_ms: Mean interval in milliseconds before the second character of
+        every correctly typed character pair.
+    :type bigram_latency_ms: dict[str, float]
+    :ivar bigram_counts: Number of correctly typed occurrences of every bigram, i.e. the
+        number of intervals its mean latency is based on.
+    :type bigram_counts: dict[str, int]
+    :ivar bigram_errors: Number of times the second character of every expected bigram
+        was mistyped right after its first character had been typed correctly.
+    :type bigram_errors: dict[str, int]
+    :ivar error_rates: Share of mistyped attempts for every expected character.
+    :type error_rates: dict[str, float]
+    :ivar intervals_ms: Every interval between consecutive typed characters, in milliseconds.
+    :type intervals_ms: list[float]
+    """
+    keystrokes: int
+    corrections: int
+    accuracy: float
+    mean_interval_ms: float
+    burst_wpm: float
+    consistency: float
+    bigram_latency_ms: dict[str, float]
+    bigram_counts: dict[str, int]
+    bigram_errors: dict[str, int]
+    error_rates: dict[str, float]
+    intervals_ms: list[float]
+
+    def slowest_bigrams(self, count: int = 3) -> list[tuple[str, float]]:
+        """
+        :param count: How many bigrams to return.
+        :type count: int
+        :return: The bigrams with the highest mean latency, slowest first.
+        :rtype: list[tuple[str, float]]
+        """
+        return sorted(self.bigram_latency_ms.items(), key=lambda item: -item[1])[:count]
+
+    def summary(self) -> str:
+        """
+        :return: A short, human-readable summary for the results screen.
+        :rtype: str
+        """
+        slowest = ", ".join(f"'{bigram}' {latency:.0f} ms" for bigram, latency in self.slowest_bigrams())
+        return (f"Accuracy: {self.accuracy:.1%}   Corrections: {self.corrections}   "
+                f"Burst: {self.burst_wpm:.1f} WPM   Consistency: {self.consistency:.0f}%\n"
+                f"Slowest bigrams: {slowest or '-'}")
+
+    def to_json(self) -> str:
+        """
+        :return: The full analysis as a JSON document.
+        :rtype: str
+        """
+        return json.dumps(self._asdict(), indent=2, ensure_ascii=False)
+
+
+def analyze(log: KeystrokeLog) -> KeystrokeAnalysis:
+    """
+    Analyses a keystroke log. NumPy is used when it is installed, and only imported
+    on the first call so it never slows down the app's startup; otherwise the
+    pure-Python implementation is used.
+
+    :param log: The keystrokes of a typing test.
+    :type log: KeystrokeLog
+    :return: The per-keystroke statistics.
+    :rtype: KeystrokeAnalysis
+    """
+    try:
+        import numpy
+    except ImportError:
+        return analyze_python(log)
+    return analyze_numpy(log, numpy)
+
+
+def preload() -> None:
+    """
+    Imports NumPy, if it is installed, ahead of the first analyze() call. Importing
+    it takes around 100 ms, so the app runs this on a background thread after
+    startup instead of stalling when the first test is completed.
+
+    :return: None
+    """
+    try:
+        import numpy
+    except ImportError:
+        pass
+
+
+def analyze_numpy(log: KeystrokeLog, np) -> KeystrokeAnalysis:
+    """
+    Vectorised implementation of analyze().
+
+    :param log: The keystrokes of a typing test.
+    :type log: KeystrokeLog
+    :param np: The numpy module.
+    :return: The per-keystroke statistics.
+    :rtype: KeystrokeAnalysis
+    """
+    typed_all = np.frombuffer(log.typed, dtype=f"u{log.typed.itemsize}")
+    chars = typed_all != CORRECTION
+    times = np.frombuffer(log.times, dtype=np.float64)[chars]
+    typed = typed_all[chars].astype(np.int64)
+    expected = np.frombuffer(log.expected, dtype=f"u{log.expected.itemsize}")[chars].astype(np.int64)
+    correct = typed == expected
+    intervals = np.diff(times) * 1000
+
+    pairs = correct[1:] & correct[:-1]
+    bigram_latency, bigram_counts = {}, {}
+    if pairs.any():
+        keys, inverse = np.unique((typed[:-1][pairs] << 21) | typed[1:][pairs], return_inverse=True)
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=intervals[pairs]) / counts
+        for key, mean, count in zip(keys.tolist(), means.tolist(), counts.tolist()):
+            bigram = chr(key >> 21) + chr(key & 0x1FFFFF)
+            bigram_latency[bigram] = mean
+            bigram_counts[bigram] = count
+
+    failed = correct[:-1] & ~correct[1:] & (expected[1:] != 0)
+    bigram_errors = {}
+    if failed.any():
+        keys, counts = np.unique((expected[:-1][failed] << 21) | expected[1:][failed], return_counts=True)
+        bigram_errors = {chr(key >> 21) + chr(key & 0x1FFFFF): count
+                         for key, count in zip(keys.tolist(), counts.tolist())}
+
+    in_target = expected != 0
+    error_rates = {}
+    if in_target.any():
+        keys, inverse = np.unique(expected[in_target], return_inverse=True)
+        rates = np.bincount(inverse, weights=~correct[in_target]) / np.bincount(inverse)
+        error_rates = {chr(key): float(rate) for key, rate in zip(keys.tolist(), rates)}
+
+    burst = 0.0
+    if len(times) > 1:
+        window = min(BURST_WINDOW, len(times) - 1)
+        spans = times[window:] - times[:-window]
+        spans = spans[spans > 0]
+        if len(spans):
+            burst = window / float(spans.min()) * 60 / CHARS_PER_WORD
+
+    mean_interval = float(intervals.mean()) if len(intervals) else 0.0
+    consistency = 0.0
+    if len(intervals) > 1 and mean_interval > 0:
+        consistency = max(0.0, 100 - float(intervals.std(ddof=1)) / mean_interval * 100)
+
+    return KeystrokeAnalysis(int(chars.sum()), int((~chars).sum()), float(correct.mean()) if len(correct) else 0.0,
+                             mean_interval, burst, consistency, bigram_latency, bigram_counts, bigram_errors,
+                             error_rates, intervals.tolist())
+
+
+def analyze_python(log: KeystrokeLog) -> KeystrokeAnalysis:
+    """
+    Pure-Python implementation of analyze(), used when NumPy is not installed.
+
+    :param log: The keystrokes of a typing test.
+    :type log: KeystrokeLog
+    :return: The per-keystroke statistics.
+    :rtype: KeystrokeAnalysis
+    """
+    times, typed, expected = [], [], []
+    for time, typed_char, expected_char in zip(log.times, log.typed, log.expected):
+        if typed_char != CORRECTION:
+            times.append(time)
+            typed.append(typed_char)
+            expected.append(expected_char)
+    correct = [typed_char == expected_char for typed_char, expected_char in zip(typed, expected)]
+    intervals = [(later - earlier) * 1000 for earlier, later in zip(times, times[1:])]
+
+    bigram_totals = {}
+    for index, interval in enumerate(intervals):
+        if correct[index] and correct[index + 1]:
+            bigram = chr(typed[index]) + chr(typed[index + 1])
+            total, count = bigram_totals.get(bigram, (0.0, 0))
+            bigram_totals[bigram] = (total + interval, count + 1)
+
+    bigram_errors = {}
+    for index in range(len(correct) - 1):
+        if correct[index] and not correct[index + 1] and expected[index + 1]:
+            bigram = chr(expected[index]) + chr(expected[index + 1])
+            bigram_errors[bigram] = bigram_errors.get(bigram, 0) + 1
+
+    error_totals = {}
+    for expected_char, is_correct in zip(expected, correct):
+        if expected_char:
+            errors, count = error_totals.get(expected_char, (0, 0))
+            error_totals[expected_char] = (errors + (not is_correct), count + 1)
+
+    burst = 0.0
+    if len(times) > 1:
+        window = min(BURST_WINDOW, len(times) - 1)
+        spans = [later - earlier for earlier, later in zip(times, times[window:]) if later > earlier]
+        if spans:
+            burst = window / min(spans) * 60 / CHARS_PER_WORD
+
+    mean_interval = statistics.fmean(intervals) if intervals else 0.0
+    consistency = 0.0
+    if len(intervals) > 1 and mean_interval > 0:
+        consistency = max(0.0, 100 - statistics.stdev(intervals) / mean_interval * 100)
+
+    return KeystrokeAnalysis(len(typed), len(log) - len(typed), sum(correct) / len(correct) if correct else 0.0,
+                             mean_interval, burst, consistency,
+                             {bigram: total / count for bigram, (total, count) in sorted(bigram_totals.items())},
+                             {bigram: count for bigram, (_, count) in sorted(bigram_totals.items())},
+                             dict(sorted(bigram_errors.items())),
+                             {chr(char): errors / count for char, (errors, count) in sorted(error_totals.items())},
+                             intervals)
@@ -0,0 +1,64 @@
+"""
+Measures adaptive word selection on large corpora: one-off bigram index build,
+incremental score updates and per-test selection time, which must stay under
+1 ms at 1M words.
+
+Usage: python benchmarks/bench_adaptive.py [--words N ...]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from adaptive import AdaptiveSampler
+from bench_corpus import write_word_file
+from corpus import WordCorpus
+
+BUDGET_MS = 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="corpus sizes to benchmark")
+    parser.add_argument("--tests", type=int, default=1000, help="number of timed selections")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    over_budget = False
+    print(f"{'words':>10} {'index s':>8} {'update ms':>10} {'select ms/test':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.words:
+            sampler = AdaptiveSampler(WordCorpus(write_word_file(directory, size)))
+            begin = time.perf_counter()
+            sampler.build_index()
+            build = time.perf_counter() - begin
+
+            bigrams = sampler.bigrams
+            scores = {bigram: rng.uniform(0, 3) for bigram in rng.sample(bigrams, min(100, len(bigrams)))}
+            sampler.update(scores)
+            changed = dict(scores)
+            for bigram in rng.sample(list(scores), 20):
+                changed[bigram] = rng.uniform(0, 3)
+            begin = time.perf_counter()
+            sampler.update(changed)
+            update = (time.perf_counter() - begin) * 1000
+
+            begin = time.perf_counter()
+            for _ in range(args.tests):
+                sampler.sample(10)
+            select = (time.perf_counter() - begin) * 1000 / args.tests
+            over_budget |= select > BUDGET_MS
+            sampler.corpus.close()
+            print(f"{size:>10} {build:>8.2f} {update:>10.3f} {select:>15.4f}")
+    if over_budget:
+        print(f"FAIL: selection exceeded the {BUDGET_MS} ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
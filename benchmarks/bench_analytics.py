@@ -0,0 +1,66 @@
+"""
+Compares the NumPy-vectorised keystroke analysis with the pure-Python loop for
+sessions of increasing length, up to a 10-minute test at 120 WPM.
+
+Usage: python benchmarks/bench_analytics.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from analytics import analyze_python
+from session import BACKSPACE, KeyEvent, TypingSession
+
+# 1 minute and 10 minutes at 120 WPM (600 characters per minute).
+KEYSTROKES = (600, 6_000, 60_000)
+
+
+def recorded_session(keystrokes: int, rng: random.Random) -> TypingSession:
+    target = " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+                      for _ in range(keystrokes // 5))[:keystrokes]
+    session = TypingSession(target)
+    now = 0.0
+    for char in target:
+        if rng.random() < 0.03:
+            now += rng.uniform(0.05, 0.2)
+            session.feed(KeyEvent(now, rng.choice(string.ascii_lowercase)))
+            now += rng.uniform(0.05, 0.2)
+            session.feed(KeyEvent(now, BACKSPACE))
+        now += rng.uniform(0.05, 0.2)
+        session.feed(KeyEvent(now, char))
+    return session
+
+
+def best_ms(func, *args, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - begin) * 1000)
+    return min(timings)
+
+
+def main() -> None:
+    try:
+        import numpy
+        from analytics import analyze_numpy
+    except ImportError:
+        numpy = None
+    rng = random.Random(0)
+    print(f"{'keystrokes':>10} {'python ms':>10} {'numpy ms':>9} {'speedup':>8}")
+    for keystrokes in KEYSTROKES:
+        log = recorded_session(keystrokes, rng).keystrokes
+        python = best_ms(analyze_python, log)
+        if numpy is None:
+            print(f"{len(log):>10} {python:>10.2f} {'n/a':>9} {'n/a':>8}  (numpy not installed)")
+            continue
+        vectorised = best_ms(analyze_numpy, log, numpy)
+        print(f"{len(log):>10} {python:>10.2f} {vectorised:>9.2f} {python / vectorised:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
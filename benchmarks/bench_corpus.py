@@ -0,0 +1,64 @@
+"""
+Compares the per-reset cost of picking test words with the original approach
+(re-reading the whole word list on every reset) against the indexed WordCorpus.
+
+Usage: python benchmarks/bench_corpus.py [--resets N]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import WordCorpus
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def legacy_pick(path: str, k: int = 10) -> str:
+    with open(path, mode="r") as file:
+        words = file.readlines()
+    return " ".join(word.strip() for word in random.sample(words, k))
+
+
+def write_word_file(directory: str, count: int) -> str:
+    path = os.path.join(directory, f"words_{count}.txt")
+    rng = random.Random(count)
+    with open(path, mode="w") as file:
+        for _ in range(count):
+            file.write("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 12))) + "\n")
+    return path
+
+
+def per_call_ms(func, resets: int) -> float:
+    begin = time.perf_counter()
+    for _ in range(resets):
+        func()
+    return (time.perf_counter() - begin) * 1000 / resets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resets", type=int, default=20, help="number of resets timed per size")
+    args = parser.parse_args()
+
+    print(f"{'words':>10} {'legacy ms/reset':>16} {'index build ms':>15} {'corpus ms/reset':>16} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = write_word_file(directory, size)
+            legacy = per_call_ms(lambda: legacy_pick(path), args.resets)
+            corpus = WordCorpus(path)
+            begin = time.perf_counter()
+            corpus.refresh()
+            build = (time.perf_counter() - begin) * 1000
+            indexed = per_call_ms(lambda: " ".join(corpus.sample(10)), args.resets * 50)
+            corpus.close()
+            print(f"{size:>10} {legacy:>16.3f} {build:>15.1f} {indexed:>16.4f} {legacy / indexed:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Per-frame cost of ghost races. Records a ghost from a scripted session, checks
+its storage round trip, and measures:
+- the replay step alone (GhostReplay.advance() plus the progress arithmetic of
+  App.update_ghost) over every frame of a race, and
+- when a display is available, whole frames of a real-time race driven by the
+  app's Ticker moving the markers of a RaceTrack, from the ticker's statistics.
+
+Exits with status 1 when the p99 frame cost exceeds the budget (1 ms by default).
+Run under `xvfb-run` on headless machines to include the Tk frames.
+
+Usage: python benchmarks/bench_ghost.py [--chars N] [--wpm WPM] [--budget-ms MS] [--fast-start]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tkinter as tk
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ghost import GHOST_FRAME_MS, Ghost, GhostReplay, record_ghost
+from session import BACKSPACE, KeyEvent, TypingSession
+from timing import NS_PER_MS, Ticker, percentile
+
+TYPO_RATE = 0.03
+
+
+def scripted_session(chars: int, wpm: float, rng: random.Random) -> TypingSession:
+    target = " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+                      for _ in range(chars // 5))[:chars].strip()
+    interval = 60 / (wpm * 5)
+    session = TypingSession(target)
+    session.start(0.0)
+    timestamp = 0.0
+    for char in target:
+        if rng.random() < TYPO_RATE:
+            session.feed(KeyEvent(timestamp, "#"))
+            session.feed(KeyEvent(timestamp + interval, BACKSPACE))
+            timestamp += 2 * interval
+        timestamp += interval * rng.uniform(0.5, 1.5)
+        session.feed(KeyEvent(timestamp, char))
+    return session
+
+
+def replay_frames(ghost: Ghost, session: TypingSession) -> array:
+    replay = GhostReplay(ghost)
+    costs = array("q")
+    frame_ms = 0.0
+    while not replay.finished:
+        begin = time.perf_counter_ns()
+        replay.advance(frame_ms)
+        session.matcher.matched / len(session.target)
+        costs.append(time.perf_counter_ns() - begin)
+        frame_ms += GHOST_FRAME_MS
+    return costs
+
+
+def tk_frames(ghost: Ghost, session: TypingSession, seconds: float) -> dict[str, float]:
+    import main as app_module
+
+    root = tk.Tk()
+    track = app_module.RaceTrack(root)
+    track.pack()
+    replay = GhostReplay(ghost)
+    started_ns = time.perf_counter_ns()
+
+    def frame(now_ns: int) -> None:
+        track.show(session.matcher.matched / len(session.target), replay.advance((now_ns - started_ns) / NS_PER_MS))
+        track.update_idletasks()
+
+    ticker = Ticker(root, frame, GHOST_FRAME_MS)
+    ticker.start()
+    root.after(int(seconds * 1000), root.quit)
+    root.mainloop()
+    ticker.stop()
+    root.destroy()
+    return ticker.stats.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chars", type=int, default=600, help="length of the raced prompt")
+    parser.add_argument("--wpm", type=float, default=80, help="speed of the ghost")
+    parser.add_argument("--seconds", type=float, default=10, help="length of the real-time race")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="fail if the p99 frame cost exceeds this")
+    parser.add_argument("--fast-start", action="store_true", help="import the app in fast-start mode")
+    args = parser.parse_args()
+
+    session = scripted_session(args.chars, args.wpm, random.Random(0))
+    begin = time.perf_counter_ns()
+    ghost = record_ghost("bench", session, args.wpm)
+    record_us = (time.perf_counter_ns() - begin) / 1000
+    data = ghost.to_bytes()
+    assert Ghost.from_bytes("bench", args.wpm, data).timeline == ghost.timeline
+    print(f"ghost: {len(session.target)} chars, {len(data)} bytes, recorded in {record_us:.0f} us, "
+          f"replays in {sum(ghost.timeline) / 1000:.1f} s (session took {session.finished_at:.1f} s)")
+
+    costs = replay_frames(ghost, session)
+    worst = percentile(costs, 0.99) / NS_PER_MS
+    print(f"replay step: {len(costs)} frames, p50 {percentile(costs, 0.5) / 1000:.2f} us, "
+          f"p99 {percentile(costs, 0.99) / 1000:.2f} us, max {max(costs) / 1000:.2f} us")
+
+    try:
+        stats = tk_frames(ghost, session, args.seconds)
+    except tk.TclError as error:
+        print(f"Tk frames skipped: {error}")
+    else:
+        worst = max(worst, stats["cost_p99_ms"])
+        print(f"Tk frames: {stats['ticks']} frames in {args.seconds:.0f} s, cost mean {stats['cost_mean_ms']:.3f} ms, "
+              f"p99 {stats['cost_p99_ms']:.3f} ms, max {stats['cost_max_ms']:.3f} ms, "
+              f"jitter p99 {stats['jitter_p99_ms']:.3f} ms")
+
+    if worst > args.budget_ms:
+        print(f"FAIL: p99 frame cost {worst:.3f} ms exceeds the {args.budget_ms:.1f} ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+End-to-end throughput benchmark of the desktop app. A synthetic keystroke bot
+types into the real App at fixed speeds from 100 to 2000 WPM, with optional
+typos that are corrected right away, by queueing a <KeyPress> event for each
+key on the entry box, like a real key press does.
+
+For every speed it measures:
+- the run time of the App.start handler per keystroke,
+- the delivery latency from the keystroke's scheduled time to its handler running,
+- the Tk event queue depth, as the number of injected key events whose handler
+  has not run yet, sampled at every injection,
+- late and dropped ticks of the metrics ticker, where a tick is late when it
+  fires more than half an interval after its deadline, and dropped ticks are
+  the ones that were skipped because the main loop was busy.
+
+Results are printed as a table, or as JSON with --json (including the git
+revision) for tracking regressions between versions. Needs a display; on
+headless machines run it under `xvfb-run`.
+
+Usage: python benchmarks/bench_gui.py [--wpm 100 250 500 1000 2000] [--seconds S] [--errors RATE] [--fast-start] [--json]
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+from array import array
+from typing import Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import main as app_module
+from session import BACKSPACE, TypingSession
+from timing import NS_PER_MS, NS_PER_SECOND, percentile
+from words import word_picker
+
+RATES_WPM = (100, 250, 500, 1000, 2000)
+CHARS_PER_WORD = 5
+LATE_TICK_FRACTION = 0.5
+KEYSYMS = {" ": "space", "'": "apostrophe", "-": "minus", ".": "period", ",": "comma", BACKSPACE: "BackSpace"}
+
+
+def distribution(samples: array) -> dict[str, float]:
+    return {"p50_ms": percentile(samples, 0.5) / NS_PER_MS, "p99_ms": percentile(samples, 0.99) / NS_PER_MS,
+            "max_ms": max(samples, default=0) / NS_PER_MS}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+class KeystrokeBot:
+    """
+    Types a script of keys into the app's entry box at a fixed rate, scheduled with
+    after() against perf_counter_ns() deadlines so a busy main loop makes the bot
+    fall behind and catch up in a burst, like a fast typist would, instead of
+    slowing down.
+
+    :ivar app: The application under test.
+    :type app: main.App
+    :ivar keys: The keys to type; BACKSPACE deletes the last character.
+    :type keys: list[str]
+    :ivar interval_ns: Time between two keystrokes, in nanoseconds.
+    :type interval_ns: int
+    :ivar pending: Scheduled time of every injected key event whose handler has not run yet.
+    :type pending: collections.deque
+    """
+
+    def __init__(self, app: "app_module.App", keys: list[str], interval_ns: int, on_done) -> None:
+        self.app = app
+        self.keys = keys
+        self.interval_ns = interval_ns
+        self.on_done = on_done
+        self.pending: collections.deque = collections.deque()
+        self.handler_ns = array("q")
+        self.delivery_ns = array("q")
+        self.queue_depth = array("I")
+        self.injection_late_ns = array("q")
+        self._next = 0
+        self._deadline = 0
+        self.started_ns = self.finished_ns = 0
+        app.main.user_entry.bind("<KeyPress>", self.handle)
+
+    def start(self) -> None:
+        self.started_ns = self._deadline = time.perf_counter_ns()
+        self.app.after_idle(self.inject)
+
+    def inject(self) -> None:
+        entry = self.app.main.user_entry
+        fired = time.perf_counter_ns()
+        while self._next < len(self.keys) and self._deadline <= fired:
+            key = self.keys[self._next]
+            self.queue_depth.append(len(self.pending))
+            self.injection_late_ns.append(fired - self._deadline)
+            entry.event_generate("<KeyPress>", keysym=KEYSYMS.get(key, key), when="tail")
+            self.pending.append(self._deadline)
+            self._next += 1
+            self._deadline += self.interval_ns
+        if self._next < len(self.keys):
+            self.app.after(max(0, -(-(self._deadline - time.perf_counter_ns()) // NS_PER_MS)), self.inject)
+
+    def handle(self, event: tk.Event) -> Optional[str]:
+        begin = time.perf_counter_ns()
+        result = self.app.start(event)
+        end = time.perf_counter_ns()
+        self.handler_ns.append(end - begin)
+        self.delivery_ns.append(begin - self.pending.popleft())
+        if not self.pending and self._next == len(self.keys):
+            self.finished_ns = end
+            self.app.after_idle(self.on_done)
+        return result
+
+
+def script(target: str, errors: float, rng: random.Random) -> list[str]:
+    keys = []
+    for char in target:
+        if rng.random() < errors:
+            keys += [rng.choice(string.ascii_lowercase.replace(char, "")), BACKSPACE]
+        keys.append(char)
+    return keys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wpm", type=int, nargs="+", default=list(RATES_WPM), help="typing speeds to benchmark")
+    parser.add_argument("--seconds", type=float, default=5.0, help="approximate typing time per speed")
+    parser.add_argument("--errors", type=float, default=0.03, help="share of characters mistyped and corrected")
+    parser.add_argument("--fast-start", action="store_true", help="run the app in fast-start mode")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    scratch = tempfile.mkdtemp()
+    app_module.SESSIONS_PATH = os.path.join(scratch, "sessions.db")
+    app_module.LEGACY_SCORES_PATH = os.path.join(scratch, "scores.csv")
+    refresh_ms = int(os.environ.get("TYPING_TEST_REFRESH_MS", app_module.REFRESH_MS))
+    app = app_module.App("Typing Speed Test", (1280, 900), refresh_ms)
+    rng = random.Random(0)
+    results = []
+    rates = list(args.wpm)
+
+    def run_next() -> None:
+        if results:
+            bot, ticks_before = current[0], current[1]
+            jitter = app.ticker.stats.jitter_ns[ticks_before:]
+            cost = app.ticker.stats.cost_ns[ticks_before:]
+            interval_ns = refresh_ms * NS_PER_MS
+            expected = int((app.session.finished_at - app.session.started_at) * NS_PER_SECOND // interval_ns)
+            results[-1].update({
+                "keystrokes": len(bot.keys),
+                "achieved_wpm": len(bot.keys) / CHARS_PER_WORD / ((bot.finished_ns - bot.started_ns) / NS_PER_SECOND / 60),
+                "handler": distribution(bot.handler_ns),
+                "delivery": distribution(bot.delivery_ns),
+                "injection_late": distribution(bot.injection_late_ns),
+                "queue_depth_max": max(bot.queue_depth, default=0),
+                "queue_depth_mean": sum(bot.queue_depth) / len(bot.queue_depth) if bot.queue_depth else 0.0,
+                "ticks": len(jitter),
+                "expected_ticks": expected,
+                "dropped_ticks": max(0, expected - len(jitter)),
+                "late_ticks": sum(1 for sample in jitter if sample > interval_ns * LATE_TICK_FRACTION),
+                "tick_jitter": distribution(jitter),
+                "tick_cost": distribution(cost),
+            })
+        if not rates:
+            app.quit()
+            return
+        wpm = rates.pop(0)
+        cps = wpm * CHARS_PER_WORD / 60
+        app.reset()
+        target = word_picker(max(10, math.ceil(cps * args.seconds / 6)))
+        app.main.test_text_label.config(text=target)
+        app.session = TypingSession(target)
+        bot = KeystrokeBot(app, script(target, args.errors, rng), round(NS_PER_SECOND / cps), run_next)
+        results.append({"wpm": wpm})
+        current[:] = [bot, len(app.ticker.stats.jitter_ns)]
+        bot.start()
+
+    current = []
+    app.main.user_entry.focus_force()
+    app.update()
+    app.after_idle(run_next)
+    app.mainloop()
+    app.destroy()
+    app.store.close()
+
+    report = {"revision": git_revision(), "python": platform.python_version(), "tk": tk.TkVersion,
+              "fast_start": app_module.FAST_START, "refresh_ms": refresh_ms, "errors": args.errors,
+              "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'wpm':>6} {'achieved':>9} {'handler p50/p99 ms':>19} {'delivery p50/p99 ms':>20} "
+          f"{'queue max':>10} {'ticks':>6} {'late':>5} {'dropped':>8}")
+    for result in results:
+        print(f"{result['wpm']:>6} {result['achieved_wpm']:>9.0f} "
+              f"{result['handler']['p50_ms']:>9.3f}/{result['handler']['p99_ms']:<9.3f} "
+              f"{result['delivery']['p50_ms']:>9.3f}/{result['delivery']['p99_ms']:<10.3f} "
+              f"{result['queue_depth_max']:>10} {result['ticks']:>6} {result['late_ticks']:>5} "
+              f"{result['dropped_ticks']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Microbenchmark of the per-keystroke correctness check, for 10, 1k, 10k and 100k
+character targets. Every variant processes the same keystrokes, typos and
+corrections included, and keeps the typed text up to date:
+- full compare: the original check, appending to or deleting from the typed
+  string and comparing it as a whole with startswith() and ==,
+- matcher: the same edits tracked by the incremental PrefixMatcher,
+- session: TypingSession.feed() plus its state, as the app's key handlers run
+  it, which also records every keystroke for the analysis.
+
+Usage: python benchmarks/bench_matcher.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session import BACKSPACE, KeyEvent, PrefixMatcher, TypingSession
+
+LENGTHS = (10, 1_000, 10_000, 100_000)
+
+
+def full_compare(target: str, events: list[KeyEvent]) -> None:
+    text = ""
+    for event in events:
+        text = text[:-1] if event.key == BACKSPACE else text + event.key
+        target.startswith(text)
+        text == target
+
+
+def prefix_matcher(target: str, events: list[KeyEvent]) -> None:
+    matcher = PrefixMatcher(target)
+    for event in events:
+        if event.key == BACKSPACE:
+            matcher.truncate(matcher.typed - 1)
+        else:
+            matcher.extend(event.key)
+        matcher.state
+
+
+def keystroke_session(target: str, events: list[KeyEvent]) -> None:
+    session = TypingSession(target)
+    for event in events:
+        session.feed(event)
+        session.state
+
+
+def per_keystroke_us(func, target, inputs) -> float:
+    begin = time.perf_counter()
+    func(target, inputs)
+    return (time.perf_counter() - begin) * 1_000_000 / len(inputs)
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'chars':>7} {'full compare us':>16} {'matcher us':>11} {'session us':>11}")
+    for length in LENGTHS:
+        target = "".join(rng.choices(string.ascii_lowercase + " ", k=length))
+        events = []
+        for index, char in enumerate(target):
+            if rng.random() < 0.05:
+                events += [KeyEvent(index, "#"), KeyEvent(index, BACKSPACE)]
+            events.append(KeyEvent(index, char))
+        print(f"{length:>7} {per_keystroke_us(full_compare, target, events):>16.3f} "
+              f"{per_keystroke_us(prefix_matcher, target, events):>11.3f} "
+              f"{per_keystroke_us(keystroke_session, target, events):>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
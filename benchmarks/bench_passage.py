@@ -0,0 +1,81 @@
+"""
+Frame-time benchmark of the passage modes: types a scripted 50k-character passage
+into a PassageView, one keystroke per frame (with 3% typos that are corrected
+right away), and reports the time per frame, i.e. feeding the keystroke plus
+update_idletasks(), together with the number of lines and characters held by the
+Text widget, which should stay flat however far into the passage the cursor is.
+
+Needs a display; on headless machines run it under `xvfb-run`.
+
+Usage: python benchmarks/bench_passage.py [--chars N] [--code]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tkinter as tk
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from passages import PassageView
+from session import BACKSPACE, KeyEvent, TypingSession
+from timing import NS_PER_MS, percentile
+
+TYPO_RATE = 0.03
+
+
+def scripted_passage(chars: int, code: bool, rng: random.Random) -> str:
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2_000)]
+    parts, length = [], 0
+    while length < chars:
+        if code:
+            part = " " * 4 * rng.randint(0, 3) + " ".join(rng.choices(words, k=rng.randint(2, 8))) + "\n"
+        else:
+            part = rng.choice(words) + " "
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:chars].rstrip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=50_000, help="length of the passage")
+    parser.add_argument("--code", action="store_true", help="type a code-like passage with its own line breaks")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    target = scripted_passage(args.chars, args.code, rng)
+    root = tk.Tk()
+    view = PassageView(root)
+    view.pack()
+    session = TypingSession(target)
+    view.load(session, code=args.code)
+    root.update()
+
+    frames = array("q")
+    max_lines = max_chars = 0
+    session.start(0.0)
+    for index, char in enumerate(target):
+        keys = ["#", BACKSPACE, char] if rng.random() < TYPO_RATE else [char]
+        for key in keys:
+            begin = time.perf_counter_ns()
+            view.type_key(KeyEvent(index * 0.1, key))
+            view.update_idletasks()
+            frames.append(time.perf_counter_ns() - begin)
+        if index % 1_000 == 0:
+            max_lines = max(max_lines, int(view.index("end-1c").split(".")[0]))
+            max_chars = max(max_chars, int(view.count("1.0", "end", "chars")[0]))
+    root.destroy()
+
+    assert session.finished and session.is_correct
+    print(f"passage: {len(target)} chars, {len(view.starts)} display lines, {len(frames)} keystrokes")
+    print(f"frame time: p50 {percentile(frames, 0.5) / NS_PER_MS:.3f} ms   "
+          f"p99 {percentile(frames, 0.99) / NS_PER_MS:.3f} ms   max {max(frames) / NS_PER_MS:.3f} ms")
+    print(f"widget size: at most {max_lines} lines, {max_chars} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Stress test of the write-behind session history: completes 10k tests as fast
+as the UI thread can record them and checks that
+- recording never stalls the UI thread, i.e. no record() call and no gap
+  between two consecutive tests exceeds the stall budget (16 ms, one frame),
+- every result, with its bigram statistics and ghosts, is in the database after
+  the store is closed, and
+- a process killed while results are being written leaves an intact database
+  holding at least every result flushed before the kill.
+
+Exits with status 1 if any check fails.
+
+Usage: python benchmarks/bench_persistence.py [--tests N] [--stall-ms MS]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ghost import Ghost
+from session import Metrics
+from storage import SessionRecord, SessionStore, connect
+from timing import NS_PER_MS, percentile
+
+BIGRAMS_PER_TEST = 20
+GHOST_EVERY = 50
+
+
+def random_record(rng: random.Random, index: int) -> SessionRecord:
+    cps = rng.uniform(1, 10)
+    wps = rng.uniform(0.2, 2)
+    bigrams = {chr(97 + pair // 26) + chr(97 + pair % 26): (1, rng.uniform(50, 400), rng.randint(0, 1))
+               for pair in rng.sample(range(26 * 26), BIGRAMS_PER_TEST)}
+    ghost = None
+    if index % GHOST_EVERY == 0:
+        ghost = Ghost(f"Words:{index % 7}", wps * 60, array("H", (rng.randint(50, 400) for _ in range(60))))
+    return SessionRecord(time.time(), rng.randint(40, 90), rng.uniform(5, 60), Metrics(cps, cps * 60, wps, wps * 60),
+                         bigrams=bigrams, ghost=ghost)
+
+
+def child(path: str, tests: int) -> None:
+    """
+    Records tests, reports how many have been flushed halfway through, then kills
+    the process while the rest are still being written.
+    """
+    rng = random.Random(1)
+    store = SessionStore(path)
+    for index in range(tests):
+        store.record(random_record(rng, index))
+        if index + 1 == tests // 2:
+            store.flush()
+            print(index + 1, flush=True)
+    os._exit(0)
+
+
+def stress(path: str, tests: int) -> tuple[array, array, SessionStore, float]:
+    rng = random.Random(0)
+    records = [random_record(rng, index) for index in range(tests)]
+    store = SessionStore(path)
+    calls = array("q")
+    gaps = array("q")
+    clock = time.perf_counter_ns
+    previous = clock()
+    for record in records:
+        begin = clock()
+        store.record(record)
+        end = clock()
+        calls.append(end - begin)
+        gaps.append(end - previous)
+        previous = end
+    begin = time.perf_counter()
+    closed = store.close()
+    assert closed
+    return calls, gaps, store, time.perf_counter() - begin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tests", type=int, default=10_000, help="number of completed tests to record")
+    parser.add_argument("--stall-ms", type=float, default=16.0, help="longest the UI thread may be held up")
+    parser.add_argument("--child", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.tests)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+        calls, gaps, store, drain_s = stress(path, args.tests)
+        worst_ms = max(max(calls), max(gaps)) / NS_PER_MS
+        print(f"{args.tests} tests recorded: record() p50 {percentile(calls, 0.5) / 1000:.1f} us, "
+              f"p99 {percentile(calls, 0.99) / 1000:.1f} us, max {max(calls) / NS_PER_MS:.3f} ms; "
+              f"longest gap between tests {max(gaps) / NS_PER_MS:.3f} ms")
+        print(f"written in {store.batches} batches, {store.failed} failed, "
+              f"{drain_s * 1000:.0f} ms left to write on close")
+        if worst_ms > args.stall_ms:
+            failures.append(f"the UI thread stalled for {worst_ms:.1f} ms")
+
+        connection = connect(path)
+        stored = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        bigram_total = connection.execute("SELECT SUM(count) FROM bigrams").fetchone()[0]
+        ghosts = connection.execute("SELECT COUNT(*) FROM ghosts").fetchone()[0]
+        connection.close()
+        print(f"stored: {stored} sessions, {bigram_total} bigram samples, {ghosts} ghosts")
+        if stored != args.tests or bigram_total != args.tests * BIGRAMS_PER_TEST or store.failed:
+            failures.append(f"{args.tests - stored} results or their bigram statistics were lost")
+
+        path = os.path.join(directory, "crash.db")
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", path, "--tests", str(args.tests)],
+                                capture_output=True, text=True, check=True)
+        flushed = int(result.stdout)
+        connection = connect(path)
+        integrity = connection.execute("PRAGMA integrity_check").fetchone()[0]
+        stored = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        connection.close()
+        print(f"killed while writing: {flushed} flushed, {stored} stored, integrity check {integrity}")
+        if integrity != "ok" or stored < flushed:
+            failures.append("the killed process lost flushed results or corrupted the database")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
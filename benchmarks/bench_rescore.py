@@ -0,0 +1,71 @@
+"""
+Throughput benchmark of rescore.py: writes a synthetic keystroke log and
+reports sessions/sec of the multiprocess re-scoring and leaderboard
+aggregation at 1, 2, 4 and 8 workers, plus the speedup over one worker.
+Speedups are bounded by the number of CPU cores, which is printed as well.
+
+Usage: python benchmarks/bench_rescore.py [--sessions N] [--users U] [--workers 1 2 4 8] [--db]
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from rescore import rescore
+from session import BACKSPACE
+
+WORDS_PER_TEST = 10
+TYPO_RATE = 0.03
+
+
+def write_log(path: str, sessions: int, users: int, rng: random.Random) -> None:
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(5_000)]
+    with open(path, mode="w", encoding="utf-8") as file:
+        for number in range(sessions):
+            target = " ".join(rng.choices(words, k=WORDS_PER_TEST))
+            interval = rng.uniform(0.08, 0.3)
+            keys, timestamp = [], 0.0
+            for char in target:
+                if rng.random() < TYPO_RATE:
+                    keys += [[timestamp, "#"], [timestamp + interval, BACKSPACE]]
+                    timestamp += 2 * interval
+                keys.append([round(timestamp, 4), char])
+                timestamp += interval * rng.uniform(0.5, 1.5)
+            file.write(json.dumps({"user": f"user-{rng.randrange(users)}", "target": target,
+                                   "finished_at": 1_700_000_000 + number, "keys": keys},
+                                  separators=(",", ":")) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200_000, help="number of sessions in the log")
+    parser.add_argument("--users", type=int, default=10_000, help="number of distinct users")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="worker counts to run")
+    parser.add_argument("--db", action="store_true", help="also write the consolidated session store")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keystrokes.jsonl")
+        write_log(path, args.sessions, args.users, random.Random(0))
+        print(f"{args.sessions} sessions, {os.path.getsize(path) / 1e6:.0f} MB, {os.cpu_count()} CPU cores")
+        print(f"{'workers':>8} {'seconds':>8} {'sessions/s':>11} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            db_path = os.path.join(directory, f"scores-{workers}.db") if args.db else None
+            begin = time.perf_counter()
+            scores = rescore([path], workers, db_path)
+            elapsed = time.perf_counter() - begin
+            assert scores.sessions == args.sessions
+            rate = scores.sessions / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>8} {elapsed:>8.2f} {rate:>11.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measures how fast the headless TypingSession engine scores recorded sessions,
+both keystroke by keystroke and through the batch replay mode.
+
+Usage: python benchmarks/bench_session.py [--sessions N] [--words K]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session import BACKSPACE, KeyEvent, TypingSession, replay_many
+
+
+def record_session(rng: random.Random, words: int, error_rate: float = 0.05) -> tuple[str, list[KeyEvent]]:
+    target = " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(words))
+    events = []
+    now = 0.0
+    for char in target:
+        if rng.random() < error_rate:
+            now += rng.uniform(0.05, 0.3)
+            events.append(KeyEvent(now, rng.choice(string.ascii_lowercase)))
+            now += rng.uniform(0.05, 0.3)
+            events.append(KeyEvent(now, BACKSPACE))
+        now += rng.uniform(0.05, 0.3)
+        events.append(KeyEvent(now, char))
+    return target, events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5000, help="number of recorded sessions to score")
+    parser.add_argument("--words", type=int, default=10, help="words per session")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sessions = [record_session(rng, args.words) for _ in range(args.sessions)]
+    total_events = sum(len(events) for _, events in sessions)
+
+    begin = time.perf_counter()
+    for target, events in sessions:
+        session = TypingSession(target)
+        for event in events:
+            session.feed(event)
+            session.metrics(event.timestamp)
+    live = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    completed = sum(finished for _, finished in replay_many(sessions))
+    batch = time.perf_counter() - begin
+
+    print(f"{args.sessions} sessions, {total_events} events, {completed} completed")
+    print(f"live (feed + metrics per event): {total_events / live:>12,.0f} events/s {args.sessions / live:>10,.0f} sessions/s")
+    print(f"batch replay:                    {total_events / batch:>12,.0f} events/s {args.sessions / batch:>10,.0f} sessions/s")
+
+
+if __name__ == "__main__":
+    main()
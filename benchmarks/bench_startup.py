@@ -0,0 +1,101 @@
+"""
+Reproducible startup benchmark for main.py: import-time breakdown from
+`python -X importtime` and time-to-first-frame of the app. Exits with status 1
+when the median time-to-first-frame exceeds the budget or a forbidden module
+is imported, so CI can fail builds that regress startup.
+
+Time-to-first-frame needs a display; on headless CI run it under `xvfb-run`.
+
+Usage: python benchmarks/bench_startup.py [--fast-start] [--runs N] [--budget-ms MS] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Modules only needed once a test has been completed or an analysis is exported.
+FORBIDDEN = ("pandas", "numpy", "analytics", "statistics")
+
+
+def import_times(env: dict[str, str]) -> dict[str, int]:
+    """
+    Imports main.py in a fresh interpreter with -X importtime.
+
+    :return: Cumulative import time in microseconds of every imported module.
+    :rtype: dict[str, int]
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        totals[name.strip()] = int(cumulative)
+    return totals
+
+
+def first_frame_ms(env: dict[str, str]) -> float:
+    """
+    Launches the app and waits until it reports its first drawn frame.
+
+    :return: Milliseconds from spawning the process to the first frame.
+    :rtype: float
+    """
+    begin = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.strip() == "first-frame":
+            elapsed = (time.perf_counter() - begin) * 1000
+            process.wait()
+            return elapsed
+    raise RuntimeError(f"the app exited without drawing a frame:\n{process.stderr.read()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fast-start", action="store_true", help="benchmark the fast-start mode")
+    parser.add_argument("--runs", type=int, default=5, help="number of app launches")
+    parser.add_argument("--budget-ms", type=float, help="fail if the median time-to-first-frame exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ, TYPING_TEST_STARTUP_PROBE="1")
+    if args.fast_start:
+        env["TYPING_TEST_FAST_START"] = "1"
+
+    imports = import_times(env)
+    frames = [first_frame_ms(env) for _ in range(args.runs)]
+    results = {
+        "fast_start": args.fast_start,
+        "first_frame_ms": {"median": statistics.median(frames), "min": min(frames), "max": max(frames)},
+        "import_us": dict(sorted(imports.items(), key=lambda item: -item[1])[:15]),
+        "forbidden_imports": sorted({name.split(".")[0] for name in imports} & set(FORBIDDEN)),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"time-to-first-frame: median {results['first_frame_ms']['median']:.1f} ms "
+              f"(min {results['first_frame_ms']['min']:.1f}, max {results['first_frame_ms']['max']:.1f})")
+        print("slowest imports (cumulative):")
+        for name, micros in results["import_us"].items():
+            print(f"  {micros / 1000:>8.1f} ms  {name}")
+
+    failed = False
+    if results["forbidden_imports"]:
+        print(f"FAIL: imported on the startup path: {', '.join(results['forbidden_imports'])}", file=sys.stderr)
+        failed = True
+    if args.budget_ms is not None and results["first_frame_ms"]["median"] > args.budget_ms:
+        print(f"FAIL: median time-to-first-frame exceeds the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the session history store with a large number of stored sessions:
+bulk load time, latency of a single recorded test and highscore query latency.
+
+Usage: python benchmarks/bench_store.py [--sessions N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session import Metrics
+from storage import SessionRecord, SessionStore, connect, insert_records
+
+BATCH = 50_000
+
+
+def random_record(rng: random.Random) -> SessionRecord:
+    cps = rng.uniform(1, 10)
+    wps = rng.uniform(0.2, 2)
+    return SessionRecord(time.time(), rng.randint(40, 90), rng.uniform(5, 60), Metrics(cps, cps * 60, wps, wps * 60))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1_000_000, help="number of stored sessions")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+        connection = connect(path)
+        begin = time.perf_counter()
+        for start in range(0, args.sessions, BATCH):
+            insert_records(connection, [random_record(rng) for _ in range(min(BATCH, args.sessions - start))])
+        load = time.perf_counter() - begin
+        connection.close()
+
+        store = SessionStore(path)
+        begin = time.perf_counter()
+        for _ in range(100):
+            store.highscores()
+        query_ms = (time.perf_counter() - begin) * 10
+
+        begin = time.perf_counter()
+        for _ in range(1000):
+            store.record(random_record(rng))
+        enqueue_us = (time.perf_counter() - begin) * 1000
+        begin = time.perf_counter()
+        store.flush()
+        flush_ms = (time.perf_counter() - begin) * 1000
+        print(f"stored sessions:          {store.count():,}")
+        store.close()
+
+    print(f"bulk load:                {args.sessions / load:,.0f} sessions/s")
+    print(f"highscores query:         {query_ms:.3f} ms")
+    print(f"record() on UI thread:    {enqueue_us:.2f} us")
+    print(f"background write of 1000: {flush_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-keystroke cost of the typing engine on prompts in English, Hindi
+(Devanagari) and Japanese (CJK), at 10, 100 and 1000 words: the one-off
+grapheme and word segmentation of the prompt, and what the app does on every
+keystroke, i.e. feeding the key, checking the input state and computing the
+metrics from grapheme and word counts. Short prompts are typed repeatedly
+until at least MIN_KEYSTROKES keystrokes have been timed, so the p99 is not
+just the single slowest keystroke.
+
+Exits with status 1 when the p99 keystroke cost exceeds the budget (100 us by default).
+
+Usage: python benchmarks/bench_unicode.py [--words 10 100 1000] [--budget-us US]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from segmentation import Segmentation
+from session import BACKSPACE, KeyEvent, TypingSession
+from timing import percentile
+from words import LANGUAGES
+
+TYPO_RATE = 0.03
+MIN_KEYSTROKES = 10_000
+
+
+def read_words(path: str) -> list[str]:
+    with open(path, mode="r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def keystroke_costs(target: str, rng: random.Random) -> array:
+    costs = array("q")
+    clock = time.perf_counter_ns
+    while len(costs) < MIN_KEYSTROKES:
+        session = TypingSession(target)
+        session.start(0.0)
+        timestamp = 0.0
+        for char in target:
+            keys = ("#", BACKSPACE, char) if rng.random() < TYPO_RATE else (char,)
+            for key in keys:
+                timestamp += 0.1
+                begin = clock()
+                session.feed(KeyEvent(timestamp, key))
+                session.state
+                session.metrics(timestamp)
+                costs.append(clock() - begin)
+        assert session.finished
+    return costs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[10, 100, 1000], help="prompt lengths in words")
+    parser.add_argument("--budget-us", type=float, default=100.0, help="fail if the p99 keystroke cost exceeds this")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    worst = 0.0
+    print(f"{'language':<20} {'words':>6} {'chars':>7} {'clusters':>9} {'segment ms':>11} "
+          f"{'p50 us':>7} {'p99 us':>7} {'max us':>7}")
+    for language, path in LANGUAGES.items():
+        vocabulary = read_words(path)
+        for words in args.words:
+            target = " ".join(rng.choices(vocabulary, k=words))
+            begin = time.perf_counter()
+            segmentation = Segmentation(target)
+            segment_ms = (time.perf_counter() - begin) * 1000
+            costs = keystroke_costs(target, rng)
+            p99 = percentile(costs, 0.99) / 1000
+            worst = max(worst, p99)
+            print(f"{language:<20} {words:>6} {len(target):>7} {segmentation.graphemes(len(target)):>9} "
+                  f"{segment_ms:>11.3f} {percentile(costs, 0.5) / 1000:>7.2f} {p99:>7.2f} {max(costs) / 1000:>7.1f}")
+
+    if worst > args.budget_us:
+        print(f"FAIL: p99 keystroke cost {worst:.1f} us exceeds the {args.budget_us:.0f} us budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
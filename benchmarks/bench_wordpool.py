@@ -0,0 +1,55 @@
+"""
+Load-time benchmark of the compiled word pool against the text word list:
+time from opening to the first sample of ten words with readlines() (the
+original approach), the indexed WordCorpus and the memory-mapped WordPool,
+plus the per-call cost of a filtered sample ("5-8 letters, home row heavy")
+from the pool, for 10k, 100k and 1M word files.
+
+Usage: python benchmarks/bench_wordpool.py [--samples N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_corpus import SIZES, legacy_pick, write_word_file
+from corpus import WordCorpus
+from wordpool import WordPool, build_pool
+
+
+def elapsed_ms(func) -> float:
+    begin = time.perf_counter()
+    func()
+    return (time.perf_counter() - begin) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=1_000, help="number of filtered samples timed per size")
+    args = parser.parse_args()
+
+    print(f"{'words':>10} {'build ms':>9} {'readlines ms':>13} {'corpus ms':>10} {'pool ms':>8} {'filtered us':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = write_word_file(directory, size)
+            pool_path = os.path.join(directory, f"words_{size}.pool")
+            build = elapsed_ms(lambda: build_pool([path], pool_path))
+            legacy = elapsed_ms(lambda: legacy_pick(path))
+            corpus = WordCorpus(path)
+            corpus_load = elapsed_ms(lambda: corpus.sample(10))
+            corpus.close()
+            pool = WordPool([pool_path])
+            pool_load = elapsed_ms(lambda: pool.sample(10))
+            begin = time.perf_counter()
+            for _ in range(args.samples):
+                pool.sample(10, 5, 8, 0)
+            filtered = (time.perf_counter() - begin) * 1_000_000 / args.samples
+            pool.close()
+            print(f"{size:>10} {build:>9.1f} {legacy:>13.2f} {corpus_load:>10.2f} {pool_load:>8.3f} {filtered:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
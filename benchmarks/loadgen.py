@@ -0,0 +1,79 @@
+"""
+Load generator for server.py: opens many concurrent client connections, each
+typing its prompt at a fixed speed, and reports the p50/p99 keystroke-ack latency.
+
+Usage: python benchmarks/loadgen.py [--clients N] [--wpm WPM] [--tests T] [--host H --port P]
+Without --port, a server is spawned on a free port for the duration of the run.
+Raise the open file limit (ulimit -n) for more than about 1000 clients.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, message: dict) -> dict:
+    writer.write(json.dumps(message).encode() + b"\n")
+    return json.loads(await reader.readline())
+
+
+async def candidate(number: int, args: argparse.Namespace, latencies: list[float], results: list[dict]) -> None:
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    await request(reader, writer, {"type": "hello", "user": f"candidate-{number}"})
+    interval = 60 / (args.wpm * 5)
+    for _ in range(args.tests):
+        prompt = (await request(reader, writer, {"type": "start", "words": args.words}))["text"]
+        for char in prompt:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * interval)
+            sent = time.perf_counter()
+            writer.write(json.dumps({"type": "key", "key": char, "t": sent}).encode() + b"\n")
+            await reader.readline()
+            latencies.append(time.perf_counter() - sent)
+        results.append(json.loads(await reader.readline()))
+    writer.close()
+
+
+async def run(args: argparse.Namespace) -> tuple[list[float], list[dict], float]:
+    latencies, results = [], []
+    begin = time.perf_counter()
+    await asyncio.gather(*(candidate(number, args, latencies, results) for number in range(args.clients)))
+    return latencies, results, time.perf_counter() - begin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500, help="number of concurrent candidates")
+    parser.add_argument("--wpm", type=float, default=60, help="typing speed of every candidate")
+    parser.add_argument("--words", type=int, default=10, help="words per prompt")
+    parser.add_argument("--tests", type=int, default=1, help="tests per candidate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of a running server; spawns one if omitted")
+    args = parser.parse_args()
+
+    server = None
+    if args.port is None:
+        server = subprocess.Popen([sys.executable, "server.py", "--host", args.host, "--port", "0"],
+                                  cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        args.port = int(server.stdout.readline().rsplit(":", 1)[1])
+    try:
+        latencies, results, elapsed = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{args.clients} clients at {args.wpm:.0f} WPM, {len(results)} tests completed in {elapsed:.1f} s")
+    print(f"keystrokes acknowledged: {len(latencies)} ({len(latencies) / elapsed:,.0f}/s)")
+    print(f"ack latency p50: {latencies[len(latencies) // 2] * 1000:.2f} ms   "
+          f"p99: {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms   max: {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
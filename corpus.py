@@ -0,0 +1,143 @@
+import codecs
+import mmap
+import os
+import random
+from array import array
+from typing import Optional
+
+# Bytes of ASCII whitespace, trimmed from both ends of every line when indexing.
+WHITESPACE = frozenset(b" \t\r\f\v")
+
+
+class WordCorpus:
+    """
+    Represents a word list stored on disk, one word per line.
+
+    The file is memory-mapped once and scanned a single time to build a compact
+    index of line offsets. Random words are then decoded straight from the
+    mapping, so drawing a sample of k words costs O(k) regardless of the corpus
+    size and no list holding every line is ever built. A leading UTF-8 byte order
+    mark and whitespace around the words are left out of the index, and blank
+    lines are skipped. Before each draw the
+    file's size and modification time are compared with the ones seen when the
+    index was built, and the index is rebuilt if the file changed on disk.
+
+    :ivar path: Path to the word list file.
+    :type path: str
+    :ivar starts: Byte offset at which the word on every non-blank line starts.
+    :type starts: array.array
+    :ivar ends: Byte offset at which the word on every non-blank line ends.
+    :type ends: array.array
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Creates a corpus for the given file. Nothing is read until the first
+        sample is requested.
+
+        :param path: Path to the word list file.
+        :type path: str
+        """
+        self.path = path
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self._mmap = None
+        self._signature = None
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> str:
+        self.refresh()
+        return self.word(index)
+
+    @property
+    def signature(self) -> Optional[tuple[int, int]]:
+        """
+        Size and modification time of the file when it was last indexed, or None
+        before the first build.
+        """
+        return self._signature
+
+    def refresh(self) -> bool:
+        """
+        Rebuilds the offset index if the file has not been indexed yet or if its
+        size or modification time changed since the last build.
+
+        :raises FileNotFoundError: If the word list file does not exist.
+        :return: True if the index was rebuilt, False if it was already current.
+        :rtype: bool
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return False
+        self._build_index()
+        self._signature = signature
+        return True
+
+    def sample(self, k: int) -> list[str]:
+        """
+        Returns k distinct words drawn uniformly at random from the corpus.
+
+        :param k: Number of words to draw.
+        :type k: int
+        :raises ValueError: If k is larger than the number of words in the corpus.
+        :return: A list of k words without their line terminators.
+        :rtype: list[str]
+        """
+        self.refresh()
+        return [self.word(index) for index in random.sample(range(len(self.starts)), k)]
+
+    def close(self) -> None:
+        """
+        Releases the memory mapping. The corpus is re-opened on the next access.
+
+        :return: None
+        """
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._mmap = None
+        self._signature = None
+
+    def word(self, index: int) -> str:
+        """
+        Returns the word with the given index without checking the file for changes.
+        Use refresh() or sample() first to make sure the index is current.
+
+        :param index: Index of the word, from 0 to len(self) - 1.
+        :type index: int
+        :return: The word without its line terminator.
+        :rtype: str
+        """
+        return self._mmap[self.starts[index]:self.ends[index]].decode("utf-8").strip()
+
+    def _build_index(self) -> None:
+        self.close()
+        starts = array("Q")
+        ends = array("Q")
+        with open(self.path, mode="rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self.starts, self.ends = starts, ends
+                self._mmap = b""
+                return
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(data)
+        position = len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+        while position < size:
+            newline = data.find(b"\n", position)
+            if newline == -1:
+                newline = size
+            start, end = position, newline
+            if end > start and (data[start] in WHITESPACE or data[end - 1] in WHITESPACE):
+                while start < end and data[start] in WHITESPACE:
+                    start += 1
+                while end > start and data[end - 1] in WHITESPACE:
+                    end -= 1
+            if end > start:
+                starts.append(start)
+                ends.append(end)
+            position = newline + 1
+        self.starts, self.ends = starts, ends
+        self._mmap = data
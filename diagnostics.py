@@ -0,0 +1,145 @@
+import cProfile
+import functools
+import json
+import os
+import platform
+import time
+from array import array
+from typing import Callable, Optional
+
+from timing import NS_PER_MS, percentile
+
+OVERLAY_WINDOW = 1000
+PROFILER_NOTICE = "cProfile is on: timings include its overhead"
+
+
+class Diagnostics:
+    """
+    Opt-in instrumentation of the app's hot paths, for tracking down laggy typing.
+
+    Functions wrapped with timed() record the run time of every call in an array,
+    which costs two clock reads and an append per call. Counters count events such
+    as label redraws. On exit, dump() writes a JSON summary of the timers.
+
+    Profiling the whole run with cProfile slows every Python call down, so it is
+    off unless requested; when on, dump() also writes the profile as a pstats file
+    and the overlay notes that its timings include the profiler's overhead.
+
+    :ivar samples: Run time of every call of every timed function, in nanoseconds, by name.
+    :type samples: dict[str, array.array]
+    :ivar counters: Number of occurrences of every counted event, by name.
+    :type counters: dict[str, int]
+    :ivar started_at: Wall-clock time at which the diagnostics started, as a Unix timestamp.
+    :type started_at: float
+    :ivar profiler: Profiler of the whole run, or None if profiling is off.
+    :type profiler: Optional[cProfile.Profile]
+    """
+
+    def __init__(self, profile: bool = False) -> None:
+        """
+        :param profile: Whether to also profile the whole run with cProfile.
+        :type profile: bool
+        """
+        self.samples: dict[str, array] = {}
+        self.counters: dict[str, int] = {}
+        self.started_at = time.time()
+        self.profiler: Optional[cProfile.Profile] = None
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """
+        :param name: Name to report the function's timings under.
+        :type name: str
+        :param func: The function to time.
+        :type func: Callable
+        :return: A wrapper of the function that records the run time of every call.
+        :rtype: Callable
+        """
+        samples = self.samples.setdefault(name, array("q"))
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            begin = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples.append(clock() - begin)
+        return wrapper
+
+    def instrument(self, obj: object, names: list[str]) -> None:
+        """
+        Replaces the given methods of an object with timed wrappers. Must be called
+        before the methods are bound to events or passed as callbacks.
+
+        :param obj: The object to instrument.
+        :type obj: object
+        :param names: Names of its methods to time.
+        :type names: list[str]
+        :return: None
+        """
+        for name in names:
+            setattr(obj, name, self.timed(name, getattr(obj, name)))
+
+    def count(self, name: str) -> None:
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def summary(self) -> dict:
+        """
+        :return: Call count and total, mean, p50, p99 and max run time in milliseconds
+            of every timed function, plus the counters.
+        :rtype: dict
+        """
+        handlers = {}
+        for name, samples in self.samples.items():
+            handlers[name] = {
+                "calls": len(samples),
+                "total_ms": sum(samples) / NS_PER_MS,
+                "mean_ms": sum(samples) / len(samples) / NS_PER_MS if samples else 0.0,
+                "p50_ms": percentile(samples, 0.5) / NS_PER_MS,
+                "p99_ms": percentile(samples, 0.99) / NS_PER_MS,
+                "max_ms": max(samples, default=0) / NS_PER_MS,
+            }
+        return {"started_at": self.started_at, "duration_s": time.time() - self.started_at,
+                "python": platform.python_version(), "platform": platform.platform(),
+                "profiled": self.profiler is not None, "handlers": handlers, "counters": dict(self.counters)}
+
+    def overlay_text(self) -> str:
+        """
+        :return: One line per timed function with its call count and the p50/p99 of its
+            last OVERLAY_WINDOW calls, followed by the counters, for the live overlay.
+            Starts with PROFILER_NOTICE while profiling.
+        :rtype: str
+        """
+        lines = [PROFILER_NOTICE] if self.profiler is not None else []
+        for name, samples in self.samples.items():
+            recent = samples[-OVERLAY_WINDOW:]
+            lines.append(f"{name:<20} {len(samples):>7}  p50 {percentile(recent, 0.5) / NS_PER_MS:7.3f} ms  "
+                         f"p99 {percentile(recent, 0.99) / NS_PER_MS:7.3f} ms")
+        lines += [f"{name:<20} {count:>7}" for name, count in self.counters.items()]
+        return "\n".join(lines)
+
+    def dump(self, directory: str) -> list[str]:
+        """
+        Stops profiling and writes the JSON summary, and the profile if profiling is on.
+
+        :param directory: Directory to write the files to; created if needed.
+        :type directory: str
+        :return: Paths of the JSON summary and, if written, of the pstats file.
+        :rtype: list[str]
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        summary_path = os.path.join(directory, f"summary-{stamp}.json")
+        with open(summary_path, mode="w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=2)
+        paths = [summary_path]
+        if self.profiler is not None:
+            profile_path = os.path.join(directory, f"profile-{stamp}.pstats")
+            self.profiler.dump_stats(profile_path)
+            paths.append(profile_path)
+        return paths
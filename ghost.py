@@ -0,0 +1,145 @@
+import sys
+from array import array
+from typing import NamedTuple
+
+from session import CORRECTION, TypingSession
+
+GHOST_FRAME_MS = 16
+MAX_DELTA_MS = 0xFFFF
+
+
+class Ghost(NamedTuple):
+    """
+    Progress timeline of a personal best run, raced against by later tests with a
+    prompt of the same kind and length.
+
+    The timeline holds one entry per character of the prompt: the milliseconds
+    between reaching the previous character (or starting the test) and typing this
+    one correctly for the last time, clamped to MAX_DELTA_MS, in an array of
+    unsigned 16-bit integers, i.e. two bytes per character.
+
+    :ivar prompt: Key of the prompts the ghost is raced on, see ghost_key().
+    :type prompt: str
+    :ivar wpm: Speed of the run, in words per minute.
+    :type wpm: float
+    :ivar timeline: Delta-encoded time at which every character was reached, in milliseconds.
+    :type timeline: array.array
+    """
+    prompt: str
+    wpm: float
+    timeline: array
+
+    def to_bytes(self) -> bytes:
+        """
+        :return: The timeline as little-endian bytes, for storage.
+        :rtype: bytes
+        """
+        if sys.byteorder == "big":
+            timeline = array("H", self.timeline)
+            timeline.byteswap()
+            return timeline.tobytes()
+        return self.timeline.tobytes()
+
+    @classmethod
+    def from_bytes(cls, prompt: str, wpm: float, data: bytes) -> "Ghost":
+        """
+        :param prompt: Key of the prompts the ghost is raced on.
+        :type prompt: str
+        :param wpm: Speed of the run, in words per minute.
+        :type wpm: float
+        :param data: The timeline as returned by to_bytes().
+        :type data: bytes
+        :return: The ghost.
+        :rtype: Ghost
+        """
+        timeline = array("H")
+        timeline.frombytes(data)
+        if sys.byteorder == "big":
+            timeline.byteswap()
+        return cls(prompt, wpm, timeline)
+
+
+def ghost_key(mode: str, target: str) -> str:
+    """
+    :param mode: The test mode the prompt was picked in.
+    :type mode: str
+    :param target: The prompt.
+    :type target: str
+    :return: The key under which the best run on prompts like this one is kept: the
+        mode and the number of words in the prompt.
+    :rtype: str
+    """
+    return f"{mode}:{len(target.split())}"
+
+
+def record_ghost(prompt: str, session: TypingSession, wpm: float) -> Ghost:
+    """
+    Extracts the progress timeline of a completed session from its keystroke log.
+
+    :param prompt: Key of the prompts the ghost is raced on.
+    :type prompt: str
+    :param session: A completed typing session.
+    :type session: TypingSession
+    :param wpm: Speed of the run, in words per minute.
+    :type wpm: float
+    :return: The ghost of the session.
+    :rtype: Ghost
+    """
+    log = session.keystrokes
+    reached = [session.started_at] * len(session.target)
+    for timestamp, position, typed, expected in zip(log.times, log.positions, log.typed, log.expected):
+        if typed != CORRECTION and typed == expected:
+            reached[position] = timestamp
+    timeline = array("H")
+    previous = session.started_at
+    for timestamp in reached:
+        timeline.append(min(MAX_DELTA_MS, max(0, round((timestamp - previous) * 1000))))
+        previous = max(previous, timestamp)
+    return Ghost(prompt, wpm, timeline)
+
+
+class GhostReplay:
+    """
+    Replays a ghost's timeline against the clock. The position is derived from the
+    time since the start of the test on every call, never from the number of
+    calls, so late or skipped frames do not make the ghost drift; each call only
+    decodes the timeline entries reached since the previous one.
+
+    :ivar ghost: The ghost being replayed.
+    :type ghost: Ghost
+    :ivar reached: Number of characters the ghost has typed so far.
+    :type reached: int
+    """
+
+    def __init__(self, ghost: Ghost) -> None:
+        self.ghost = ghost
+        self.reached = 0
+        self._next_at_ms = ghost.timeline[0] if ghost.timeline else 0
+
+    @property
+    def progress(self) -> float:
+        """
+        :return: Share of the prompt the ghost has typed, from 0 to 1.
+        :rtype: float
+        """
+        return self.reached / len(self.ghost.timeline) if self.ghost.timeline else 1.0
+
+    @property
+    def finished(self) -> bool:
+        return self.reached >= len(self.ghost.timeline)
+
+    def advance(self, elapsed_ms: float) -> float:
+        """
+        Moves the ghost to where it was the given time into its run.
+
+        :param elapsed_ms: Time since the start of the test, in milliseconds.
+        :type elapsed_ms: float
+        :return: Share of the prompt the ghost has typed, from 0 to 1.
+        :rtype: float
+        """
+        timeline = self.ghost.timeline
+        while self.reached < len(timeline) and self._next_at_ms <= elapsed_ms:
+            self.reached += 1
+            if self.reached < len(timeline):
+                self._next_at_ms += timeline[self.reached]
+        return self.progress
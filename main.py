@@ -1,48 +1,75 @@
 import tkinter as tk
-import ttkbootstrap as ttk
-from ttkbootstrap import Style
-import time
+import os
+import sys
 import threading
-import random
-import pandas as pd
-
-FUNC_KEYS = [64, 113, 22, 110, 66, 37, 109, 107, 104, 103, 9, 111, 67, 68, 96, 97, 106, 100, 54, 90, 87, 88, 89, 83,
-             84, 85, 79, 80, 81, 86, 84, 91, 91, 112, 88, 87, 108, 79, 90, 83, 63, 89, 81, 85, 82, 80, 105, 77, 110,
-             111, 99, 36, 102, 78, 50, 62, 23, 98]
-
-
-def load_words() -> list[str]:
-    """
-    Reads a list of words from a file and returns them as a list of strings.
-
-    This function attempts to read the "words.txt" file located in the
-    "./assets/" directory. It returns the contents of the file as a list of
-    lines, with each line representing a single word. If the file cannot
-    be found, a message is printed to the console, and the program
-    terminates.
-
-    :return: A list of strings representing the words read from the file.
-    :rtype: list[str]
-    """
-    try:
-        with open("./assets/words.txt", mode="r") as file:
-            return file.readlines()
-    except FileNotFoundError:
-        print("words.txt file not found!")
-        exit()
-
-
-def word_picker(k=10) -> str:
-    """
-    Constructs and returns a string by randomly selecting a specified number of words
-    from a loaded list, separating the selected words with spaces.
+import time
+from typing import Optional
+
+# Fast-start mode skips ttkbootstrap and its theme engine, which dominate the cold
+# start, and falls back to the plain ttk widgets with a built-in theme.
+FAST_START = "--fast-start" in sys.argv or os.environ.get("TYPING_TEST_FAST_START") == "1"
+if FAST_START:
+    from tkinter import ttk
+else:
+    import ttkbootstrap as ttk
+
+# Diagnostics mode times the hot paths and shows a live overlay of the timings;
+# it is imported and started only when requested. Profiling the whole run is a
+# separate request, as cProfile inflates the timings.
+PROFILE = "--profile" in sys.argv or os.environ.get("TYPING_TEST_PROFILE") == "1"
+if PROFILE or "--diagnostics" in sys.argv or os.environ.get("TYPING_TEST_DIAGNOSTICS") == "1":
+    from diagnostics import Diagnostics
+    DIAGNOSTICS = Diagnostics(profile=PROFILE)
+else:
+    DIAGNOSTICS = None
+
+from adaptive import baseline_latency, bigram_scores
+from ghost import GHOST_FRAME_MS, GhostReplay, ghost_key, record_ghost
+from passages import CODE, WORDS, PassageView, available_modes, key_for, pick_passage
+from session import BACKSPACE, COMPLETE, CORRECT, ERROR, KeyEvent, Metrics, TypingSession
+from storage import SessionRecord, SessionStore
+from timing import NS_PER_MS, NS_PER_SECOND, Ticker, now
+from wordpool import MAX_LENGTH
+from words import ADAPTIVE_SAMPLER, ENGLISH, WORDS_PATH, available_languages, filters_match, pool_is_current, word_picker
+
+if DIAGNOSTICS is not None:
+    word_picker = DIAGNOSTICS.timed("word_picker", word_picker)
+
+THEME = "litera"
+FAST_START_THEME = "clam"
+
+ENTRY_COLORS = {CORRECT: "black", ERROR: "red", COMPLETE: "green"}
+
+REFRESH_MS = 100
+
+DIAGNOSTICS_DIR = os.environ.get("TYPING_TEST_DIAGNOSTICS_DIR", "diagnostics")
+OVERLAY_REFRESH_MS = 500
+HOT_PATHS = ["start", "on_passage_key", "update_metrics", "update_ghost", "reset", "check_for_highscore",
+             "load_highscores"]
+
+SESSIONS_PATH = "assets/sessions.db"
+LEGACY_SCORES_PATH = "assets/scores.csv"
+# Longest the app waits on exit for queued test results to be written, in seconds.
+SHUTDOWN_TIMEOUT_S = 10.0
+# Delay after startup before the keystroke analysis and NumPy are imported in the
+# background, late enough not to hold up the first frame.
+ANALYTICS_PRELOAD_MS = 1000
+
+# Word filters offered in the words mode, which need a compiled word pool.
+WORD_LENGTHS = {"Any length": None, "2-4 letters": (2, 4), "5-8 letters": (5, 8), "9+ letters": (9, MAX_LENGTH)}
+WORD_DIFFICULTIES = {"Any keys": None, "Home row heavy": 0, "Home and top row": 1}
+
+WORDS_DESCRIPTION = "Start typing to begin the test.\nType the ten words shown below - without mistakes.\n"
+FILTER_NOTICE = "Fewer than ten words match the selected length and difficulty,\nso the words are picked from the whole pool."
+ADAPTIVE_NOTICE = "Adaptive practice is still indexing the word list,\nso these words are picked at random."
+PASSAGE_NOTICE = "No text was found for the {} mode,\nso this is a words test."
+PASSAGE_DESCRIPTION = "Start typing to begin the test.\nType the passage below - without mistakes.\n"
+
+
+def preload_analytics() -> None:
+    from analytics import preload
+    preload()
 
-    :param k: An integer representing the number of words to randomly pick from
-        the list. Default value is 10.
-    :return: A string composed of randomly selected words joined by spaces.
-    """
-    words_list = [word.strip() for word in random.sample(load_words(), k)]
-    return " ".join(words_list)
 
 class GUI(tk.Tk):
     """
@@ -69,7 +96,9 @@ class GUI(tk.Tk):
         A class constructor for initializing a graphical user interface. The
         class sets various properties such as window dimensions, title, and
         minimum size. Additionally, it applies a theme using the built-in
-        Style class, and initializes and packs a main widget.
+        Style class, and initializes and packs a main widget. The ttkbootstrap
+        theme is built once by the Style constructor; in fast-start mode a
+        built-in ttk theme is used instead.
 
         :param title: The title of the window
         :type title: str
@@ -83,8 +112,11 @@ class GUI(tk.Tk):
         self.center_window()
         self.minsize(600, 600)
         self.diameter = size
-        self.style = Style()
-        self.style.theme_use("litera")
+        if FAST_START:
+            self.style = ttk.Style(self)
+            self.style.theme_use(FAST_START_THEME)
+        else:
+            self.style = ttk.Style(theme=THEME)
         self.main = Main(self)
         self.main.pack(expand=True, fill="y")
 
@@ -103,6 +135,39 @@ class GUI(tk.Tk):
         self.geometry('{}x{}+{}+{}'.format(self.width, self.height, x, y))
 
 
+class RaceTrack(tk.Canvas):
+    """
+    Thin progress track showing how far the user and the ghost of their best run
+    are through the prompt. Markers are only moved when their pixel position
+    changes.
+
+    :ivar length: Width of the track in pixels.
+    :type length: int
+    """
+
+    def __init__(self, parent: tk.Misc, length: int = 600, **kwargs) -> None:
+        super().__init__(parent, width=length, height=20, highlightthickness=0, **kwargs)
+        self.length = length
+        self.create_line(0, 10, length, 10, fill="#cccccc", width=2)
+        self._ghost = self.create_rectangle(0, 2, 4, 18, fill="#aaaaaa", outline="")
+        self._user = self.create_rectangle(0, 2, 4, 18, fill="#1f6feb", outline="")
+        self._shown = {self._ghost: 0, self._user: 0}
+
+    def show(self, user: float, ghost: float) -> None:
+        """
+        :param user: Share of the prompt typed by the user, from 0 to 1.
+        :type user: float
+        :param ghost: Share of the prompt typed by the ghost, from 0 to 1.
+        :type ghost: float
+        :return: None
+        """
+        for item, progress in ((self._ghost, ghost), (self._user, user)):
+            x = round(progress * (self.length - 4))
+            if x != self._shown[item]:
+                self._shown[item] = x
+                self.coords(item, x, 2, x + 4, 18)
+
+
 class Main(ttk.Frame):
     """
     Represents the primary interface for the typing speed test application.
@@ -115,15 +180,27 @@ class Main(ttk.Frame):
     :type highscore_label: ttk.Label
     :ivar title_label: Label to display the title of the application.
     :type title_label: ttk.Label
+    :ivar mode_var: String variable tracking the selected test mode.
+    :type mode_var: tk.StringVar
+    :ivar mode_select: Combobox to choose between words, paragraph, book excerpt and code tests.
+    :type mode_select: ttk.Combobox
+    :ivar language_var: String variable tracking the selected language of the words tests.
+    :type language_var: tk.StringVar
+    :ivar language_select: Combobox to choose the language of the words tests.
+    :type language_select: ttk.Combobox
     :ivar description_label: Label to display instructions for the typing test.
     :type description_label: ttk.Label
     :ivar test_text_label: Label to display the randomly generated words
         for users to type.
     :type test_text_label: ttk.Label
     :ivar entry_var: String variable to track user input in the entry box.
-    :type entry_var: ttk.StringVar
+    :type entry_var: tk.StringVar
     :ivar user_entry: Entry widget for the user to type words.
     :type user_entry: ttk.Entry
+    :ivar passage_view: Virtualised text view typed over in place in the passage modes,
+        shown instead of the test text label and entry box; created when a passage mode
+        is first selected, None until then.
+    :type passage_view: PassageView or None
     :ivar info_label: Label to display descriptive text for typing speed metrics.
     :type info_label: ttk.Label
     :ivar cps_label: Label to display the typing speed in characters per second.
@@ -139,6 +216,30 @@ class Main(ttk.Frame):
     :ivar final_score_label: Label to display the user's final score upon
         completion of the test.
     :type final_score_label: ttk.Label
+    :ivar analysis_label: Label to display the keystroke analysis upon completion of the test.
+    :type analysis_label: ttk.Label
+    :ivar export_button: Button to save the keystroke analysis of the last test as JSON.
+    :type export_button: ttk.Button
+    :ivar adaptive_var: Boolean variable tracking whether adaptive practice is enabled.
+    :type adaptive_var: tk.BooleanVar
+    :ivar adaptive_check: Checkbutton to pick words based on the user's slow bigrams.
+    :type adaptive_check: ttk.Checkbutton
+    :ivar length_var: String variable tracking the selected word length filter.
+    :type length_var: tk.StringVar
+    :ivar length_select: Combobox to choose the length of the words, enabled when a
+        compiled word pool is available.
+    :type length_select: ttk.Combobox
+    :ivar difficulty_var: String variable tracking the selected word difficulty filter.
+    :type difficulty_var: tk.StringVar
+    :ivar difficulty_select: Combobox to choose how close to the home row the words are
+        typed, enabled when a compiled word pool is available.
+    :type difficulty_select: ttk.Combobox
+    :ivar race_track: Progress of the user and the ghost of their best run during a ghost race.
+    :type race_track: RaceTrack
+    :ivar ghost_var: Boolean variable tracking whether ghost races are enabled.
+    :type ghost_var: tk.BooleanVar
+    :ivar ghost_check: Checkbutton to race against the ghost of the best run on prompts of the same length.
+    :type ghost_check: ttk.Checkbutton
     """
 
     def __init__(self, parent: tk.Misc) -> None:
@@ -167,19 +268,30 @@ class Main(ttk.Frame):
         self.title_label = ttk.Label(self, text="Test your typing speed", font=("Futura", 24, "bold"), justify="left")
         self.title_label.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="wn")
 
-        self.description_label = ttk.Label(self, text="Start typing to begin the test.\n"
-                                                      "Type the ten words shown below - without mistakes.\n",
+        self.mode_var = tk.StringVar(value=WORDS)
+        self.mode_select = ttk.Combobox(self, textvariable=self.mode_var, values=available_modes(),
+                                        state="readonly", width=14)
+        self.mode_select.grid(row=1, column=1, padx=5, pady=5, sticky="en")
+
+        self.language_var = tk.StringVar(value=ENGLISH)
+        self.language_select = ttk.Combobox(self, textvariable=self.language_var, values=available_languages(),
+                                            state="readonly", width=14)
+        self.language_select.grid(row=2, column=1, padx=5, pady=5, sticky="en")
+
+        self.description_label = ttk.Label(self, text=WORDS_DESCRIPTION,
                                            font=("Futura", 18, "italic"), justify="left")
         self.description_label.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky="wn")
 
         self.test_text_label = ttk.Label(self, text=word_picker(), font=("Futura", 20), relief="sunken")
         self.test_text_label.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
 
-        self.entry_var = ttk.StringVar()
+        self.entry_var = tk.StringVar()
         self.user_entry = ttk.Entry(self, width=40, font=("Futura", 24), textvariable=self.entry_var)
         self.user_entry.grid(row=4, column=0, columnspan=2, padx=5, pady=10)
         self.user_entry.focus_set()
 
+        self.passage_view = None
+
         self.info_label = ttk.Label(self, text="Your typing speed:", font=("Futura", 20), justify="center")
         self.info_label.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
 
@@ -192,12 +304,75 @@ class Main(ttk.Frame):
         self.wpm_label = ttk.Label(self, text="0.00 Words/minute", font=("Futura", 20), justify="right")
         self.wpm_label.grid(row=7, column=1, columnspan=1, padx=5, pady=5, sticky="news")
 
-        self.reset_button = ttk.Button(self, text="Reset", bootstyle='warning', width=20)
+        if FAST_START:
+            self.reset_button = ttk.Button(self, text="Reset", width=20)
+        else:
+            self.reset_button = ttk.Button(self, text="Reset", bootstyle='warning', width=20)
         self.reset_button.grid(row=8, column=0, columnspan=2, padx=5, pady=10)
 
         self.final_score_label = ttk.Label(self, font=("Futura", 14, "bold"))
         self.final_score_label.grid(row=9, column=0, columnspan=2, padx=5, pady=5, sticky="n")
 
+        self.analysis_label = ttk.Label(self, font=("Futura", 12), justify="center")
+        self.analysis_label.grid(row=10, column=0, columnspan=2, padx=5, pady=5, sticky="n")
+
+        self.export_button = ttk.Button(self, text="Export analysis", width=20, state="disabled")
+        self.export_button.grid(row=11, column=0, columnspan=2, padx=5, pady=5)
+
+        self.adaptive_var = tk.BooleanVar(value=False)
+        self.adaptive_check = ttk.Checkbutton(self, text="Adaptive practice: focus on the letter pairs you type slowest",
+                                              variable=self.adaptive_var)
+        self.adaptive_check.grid(row=12, column=0, columnspan=2, padx=5, pady=5)
+
+        filter_state = "readonly" if pool_is_current() else "disabled"
+        self.length_var = tk.StringVar(value=next(iter(WORD_LENGTHS)))
+        self.length_select = ttk.Combobox(self, textvariable=self.length_var, values=list(WORD_LENGTHS),
+                                          state=filter_state, width=14)
+        self.length_select.grid(row=13, column=0, padx=5, pady=5, sticky="e")
+        self.difficulty_var = tk.StringVar(value=next(iter(WORD_DIFFICULTIES)))
+        self.difficulty_select = ttk.Combobox(self, textvariable=self.difficulty_var, values=list(WORD_DIFFICULTIES),
+                                              state=filter_state, width=16)
+        self.difficulty_select.grid(row=13, column=1, padx=5, pady=5, sticky="w")
+
+        self.race_track = RaceTrack(self)
+        self.race_track.grid(row=14, column=0, columnspan=2, padx=5, pady=5)
+        self.ghost_var = tk.BooleanVar(value=True)
+        self.ghost_check = ttk.Checkbutton(self, text="Ghost race: race against your best run on prompts of this length",
+                                           variable=self.ghost_var)
+        self.ghost_check.grid(row=15, column=0, columnspan=2, padx=5, pady=5)
+
+    def create_passage_view(self) -> PassageView:
+        """
+        Creates the passage view, hidden.
+
+        :return: The passage view.
+        :rtype: PassageView
+        """
+        self.passage_view = PassageView(self, font=("Futura", 18), relief="sunken")
+        self.passage_view.grid(row=3, column=0, rowspan=2, columnspan=2, padx=5, pady=5)
+        self.passage_view.grid_remove()
+        return self.passage_view
+
+    def show_passage(self, passage: bool) -> None:
+        """
+        Switches between the words mode widgets and the passage view.
+
+        :param passage: Whether a passage mode is selected.
+        :type passage: bool
+        :return: None
+        """
+        if passage:
+            self.test_text_label.grid_remove()
+            self.user_entry.grid_remove()
+            self.passage_view.grid()
+            self.description_label.config(text=PASSAGE_DESCRIPTION)
+        else:
+            if self.passage_view is not None:
+                self.passage_view.grid_remove()
+            self.test_text_label.grid()
+            self.user_entry.grid()
+            self.description_label.config(text=WORDS_DESCRIPTION)
+
 
 
 class App(GUI):
@@ -208,12 +383,25 @@ class App(GUI):
     calculating typing speed metrics, and tracking and updating highscores. It also communicates
     with the GUI to display real-time statistics and test results. The application tracks
     character per second (CPS), character per minute (CPM), word per second (WPS), and
-    word per minute (WPM) scores, saving highscores to a file.
-
-    :ivar counter: Tracks the elapsed time in seconds since the start of the test.
-    :type counter: float
-    :ivar running: Indicates whether the typing test is currently in progress.
-    :type running: bool
+    word per minute (WPM) scores, saving every completed test to the session history.
+
+    :ivar session: Scoring engine for the test currently shown, fed from the entry box
+        or, in the passage modes, from the passage view.
+    :type session: TypingSession
+    :ivar ticker: Refreshes the typing speed labels on the main thread while the test is running.
+    :type ticker: Ticker
+    :ivar ghost_ticker: Moves the race track markers on the main thread during a ghost race.
+    :type ghost_ticker: Ticker
+    :ivar replay: The ghost raced against in the current test, or None.
+    :type replay: GhostReplay or None
+    :ivar ghosts: The ghost of the fastest run on every kind of prompt, by prompt key.
+    :type ghosts: dict[str, ghost.Ghost]
+    :ivar overlay: Live overlay of the handler timings in diagnostics mode, or None.
+    :type overlay: tk.Label or None
+    :ivar shown_metrics: The formatted metrics currently shown on the labels, or None after a reset.
+    :type shown_metrics: tuple[str, str, str, str] or None
+    :ivar entry_state: The correctness state the entry box is currently coloured for.
+    :type entry_state: str
     :ivar highscore_cps: Stores the highest characters-per-second score achieved.
     :type highscore_cps: float
     :ivar highscore_cpm: Stores the highest characters-per-minute score achieved.
@@ -222,127 +410,289 @@ class App(GUI):
     :type highscore_wps: float
     :ivar highscore_wpm: Stores the highest words-per-minute score achieved.
     :type highscore_wpm: float
-    :ivar highscores: A pandas DataFrame containing the current highscores, or None if not loaded.
-    :type highscores: pandas.DataFrame or None
+    :ivar analysis: Keystroke analysis of the last completed test, or None.
+    :type analysis: analytics.KeystrokeAnalysis or None
+    :ivar store: Persistent history of every completed test, used to look up the highscores.
+    :type store: SessionStore
+    :ivar bigram_stats: Running per-bigram totals over all completed tests, as (correctly
+        typed count, total latency in milliseconds, errors).
+    :type bigram_stats: dict[str, tuple[int, float, int]]
+    :ivar baseline_ms: The user's mean latency between keystrokes when the app started,
+        which adaptive practice compares every bigram with.
+    :type baseline_ms: float
     """
 
-    def __init__(self, title: str, size: tuple[int, int]) -> None:
+    def __init__(self, title: str, size: tuple[int, int], refresh_ms: int = REFRESH_MS) -> None:
+        if DIAGNOSTICS is not None:
+            DIAGNOSTICS.instrument(self, HOT_PATHS)
         super().__init__(title, size)
-        self.counter = 0
-        self.running = False
+        self.session = TypingSession(self.main.test_text_label.cget('text'))
+        self.ticker = Ticker(self, self.update_metrics, refresh_ms)
+        self.ghost_ticker = Ticker(self, self.update_ghost, GHOST_FRAME_MS)
+        self.replay = None
+        self.shown_metrics = None
+        self.entry_state = CORRECT
+        self.analysis = None
 
         self.highscore_cps = 0.00
         self.highscore_cpm = 0.00
         self.highscore_wps = 0.00
         self.highscore_wpm = 0.00
-        self.highscores = None
+        self.store = SessionStore(SESSIONS_PATH)
         self.load_highscores()
 
         self.main.highscore_label.config(
             text=f"Your highscore: {self.highscore_cpm} CPM ({self.highscore_cps} CPS)\t{self.highscore_wpm} WPM ({self.highscore_wps} WPS)")
-        self.main.user_entry.bind("<KeyRelease>", self.start)
+        self.main.user_entry.bind("<KeyPress>", self.start)
+        for sequence in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>"):
+            self.main.user_entry.bind(sequence, lambda event: "break")
         self.main.reset_button.configure(command=self.reset)
-
+        self.main.export_button.configure(command=self.export_analysis)
+        self.main.adaptive_check.configure(command=self.reset)
+        self.main.ghost_check.configure(command=self.reset)
+        self.main.mode_select.bind("<<ComboboxSelected>>", lambda event: self.reset())
+        self.main.language_select.bind("<<ComboboxSelected>>", lambda event: self.reset())
+        self.main.length_select.bind("<<ComboboxSelected>>", lambda event: self.reset())
+        self.main.difficulty_select.bind("<<ComboboxSelected>>", lambda event: self.reset())
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.overlay = None
+        if DIAGNOSTICS is not None:
+            self.overlay = tk.Label(self, font=("Courier", 10), justify="left", background="#fffbe6")
+            self.overlay.place(relx=1.0, y=0, anchor="ne")
+            self.bind("<Expose>", lambda event: DIAGNOSTICS.count("expose"), add="+")
+            self.overlay_ticker = Ticker(self, self.update_overlay, OVERLAY_REFRESH_MS)
+            self.overlay_ticker.start()
+
+        self.after(ANALYTICS_PRELOAD_MS, self.preload_analytics)
         self.update_idletasks()
 
+    def preload_analytics(self) -> None:
+        """
+        Imports the keystroke analysis and NumPy on a background thread, so the first
+        completed test does not stall the Tk thread while they load.
+
+        :return: None
+        """
+        threading.Thread(target=preload_analytics, name="analytics preload", daemon=True).start()
+
     def load_highscores(self) -> None:
         """
-        Loads high scores from a CSV file or initializes defaults if the file is not
-        found.
-
-        This function attempts to load high score data from a pre-defined file
-        location. If the file is missing or cannot be accessed, it creates a new
-        default DataFrame for storing high scores. The function ensures that
-        the attributes `highscore_cps`, `highscore_cpm`, `highscore_wps`, and
-        `highscore_wpm` are updated with the corresponding values from the file
-        or default values.
-
-        :raises FileNotFoundError: If the file 'assets/scores.csv' cannot be found.
-        """
-        try:
-            self.highscores = pd.read_csv('assets/scores.csv')
-            self.highscore_cps = self.highscores.loc[0, "HIGHSCORE_CPS"]
-            self.highscore_cpm = self.highscores.loc[0, "HIGHSCORE_CPM"]
-            self.highscore_wps = self.highscores.loc[0, "HIGHSCORE_WPS"]
-            self.highscore_wpm = self.highscores.loc[0, "HIGHSCORE_WPM"]
-        except FileNotFoundError:
-            self.highscores = pd.DataFrame(data={
-                "HIGHSCORE_CPS": self.highscore_cps,
-                "HIGHSCORE_CPM": self.highscore_cpm,
-                "HIGHSCORE_WPS": self.highscore_wps,
-                "HIGHSCORE_WPM": self.highscore_wpm
-            },
-                index=[0])
-
-    def start(self, event: tk.Event) -> None:
-        """
-        Handles the starting and execution logic for tracking typing events and updating the GUI
-        elements accordingly. This function starts a timing thread when needed, updates the
-        font color of the user entry field based on the correctness of the input, and
-        checks for high scores upon successful completion of the typing task.
-
-        :param event: Event object containing metadata about the user-initiated action;
-            commonly used to determine the pressed key.
-        :type event: Event
+        Loads high scores, the per-bigram statistics used by adaptive practice and the
+        ghosts of the best runs from the session history.
+
+        The highscores kept in 'assets/scores.csv' by earlier versions of the app are
+        imported into the history the first time it is opened. The attributes
+        `highscore_cps`, `highscore_cpm`, `highscore_wps`, and `highscore_wpm` are
+        updated with the best stored scores, or keep their defaults if no test has
+        been completed yet.
+
         :return: None
         """
-        if not self.running:
-            if event.keycode not in FUNC_KEYS:
-                self.running = True
-                t = threading.Thread(target=self.time_thread)
-                t.start()
-        if not self.main.test_text_label.cget('text').startswith(self.main.entry_var.get()):
-            self.main.user_entry.config(foreground='red')
-        else:
-            self.main.user_entry.config(foreground='black')
-        if self.main.entry_var.get() == self.main.test_text_label.cget('text'):
-            self.running = False
-            self.main.user_entry.config(foreground='green')
+        self.store.import_scores_csv(LEGACY_SCORES_PATH)
+        highscores = self.store.highscores()
+        self.highscore_cps = highscores.cps
+        self.highscore_cpm = highscores.cpm
+        self.highscore_wps = highscores.wps
+        self.highscore_wpm = highscores.wpm
+        self.bigram_stats = self.store.bigram_stats()
+        self.ghosts = self.store.ghosts()
+        self.baseline_ms = baseline_latency(self.bigram_stats)
+        ADAPTIVE_SAMPLER.update(bigram_scores(self.bigram_stats, self.baseline_ms))
+
+    def start(self, event: tk.Event) -> Optional[str]:
+        """
+        Handles a key press in the entry box. Like in the passage view, the keystroke is
+        fed to the typing session directly, one character at a time for the several
+        characters an input method may commit at once, and mirrored into the entry box by
+        appending or deleting its last character, so neither the entry's text nor the
+        typed text is read back or compared as a whole, and the cost per keystroke does
+        not grow with the length of the test text. This function starts the metrics
+        ticker with the first key that types something, ignoring Backspace before it,
+        updates the font color of the user entry field when the correctness of the input
+        changes, and checks for high scores upon successful completion of the typing task.
+        The entry's own editing is suppressed, except for Tab, which moves the focus.
+
+        :param event: The <KeyPress> event.
+        :type event: tk.Event
+        :return: "break", to stop the entry's default bindings, or None for Tab.
+        :rtype: str or None
+        """
+        if event.keysym in ("Tab", "ISO_Left_Tab"):
+            return None
+        key = key_for(event)
+        if key is None or key == "\n" or self.session.finished or (key == BACKSPACE and not self.session.started):
+            return "break"
+        timestamp = now()
+        if not self.session.started:
+            self.session.start(timestamp)
+            self.ticker.start()
+            self.start_ghost()
+        completed = False
+        for char in (key,) if key == BACKSPACE else key:
+            if char == BACKSPACE:
+                if self.session.matcher.typed:
+                    self.main.user_entry.delete(self.session.matcher.typed - 1)
+            else:
+                self.main.user_entry.insert(tk.END, char)
+            completed = self.session.feed(KeyEvent(timestamp, char))
+            if completed:
+                break
+        state = self.session.state
+        if state != self.entry_state:
+            self.entry_state = state
+            self.main.user_entry.config(foreground=ENTRY_COLORS[state])
+        if completed:
+            self.ticker.stop()
             self.check_for_highscore()
+        return "break"
 
+    def on_passage_key(self, event: tk.Event) -> str:
+        """
+        Handles a key press in the passage view. The keystroke is fed to the typing
+        session directly and only the marks of the affected character are updated, so
+        the cost per keystroke is the same at the start and the end of a long passage.
+        The widget's own text editing is always suppressed.
+
+        :param event: The <KeyPress> event.
+        :type event: tk.Event
+        :return: "break", to stop the Text widget's default bindings.
+        :rtype: str
+        """
+        key = key_for(event)
+        if key is None or self.session.finished or (key == BACKSPACE and not self.session.started):
+            return "break"
+        timestamp = now()
+        if not self.session.started:
+            self.session.start(timestamp)
+            self.ticker.start()
+            self.start_ghost()
+        completed = False
+        for char in (key,) if key == BACKSPACE else key:
+            completed = self.main.passage_view.type_key(KeyEvent(timestamp, char))
+            if completed:
+                break
+        if completed:
+            self.ticker.stop()
+            self.check_for_highscore()
+        return "break"
 
-    def time_thread(self) -> None:
+    def ghost_mode(self) -> str:
         """
-        Continuously calculates and updates typing speed metrics while running.
-        This function is intended to execute within a separate thread. It monitors
-        a running condition and performs periodic computations of typing speed in terms of
-        characters per second, characters per minute, words per second, and words per minute.
-        The calculated metrics are dynamically updated on corresponding labels in the user interface.
+        :return: The test mode, qualified with the language of words tests in languages
+            other than English, so that ghosts are only raced on prompts of their own kind.
+        :rtype: str
+        """
+        mode = self.main.mode_var.get()
+        language = self.main.language_var.get()
+        return mode if mode != WORDS or language == ENGLISH else f"{mode} ({language})"
 
-        While the thread is active (defined by the `running` attribute), the loop will:
-          - Increment a counter with a timed interval (0.1 seconds).
-          - Compute typing speed metrics based on the text entered in the GUI input field.
-          - Update related GUI labels with the computed values.
+    def start_ghost(self) -> None:
+        """
+        Starts replaying the ghost of the best run on prompts like the current one, if
+        ghost races are enabled and there is one. The ghost runs on its own ticker, so
+        it adds nothing to the handling of the following keystrokes.
 
-        :raises RuntimeError: If there are issues with thread operation during execution.
         :return: None
         """
-        while self.running:
-            time.sleep(0.1)
-            self.counter += 0.1
-            chars_per_second = len(self.main.entry_var.get()) / self.counter
-            chars_per_minute = chars_per_second * 60
-            words_per_second = len(self.main.entry_var.get().split(" ")) / self.counter
-            words_per_minute = words_per_second * 60
-            self.main.cps_label.config(text=f"{chars_per_second:.2f} Characters/second")
-            self.main.cpm_label.config(text=f"{chars_per_minute:.2f} Characters/minute")
-            self.main.wps_label.config(text=f"{words_per_second:.2f} Words/second")
-            self.main.wpm_label.config(text=f"{words_per_minute:.2f} Words/minute")
+        ghost = self.ghosts.get(ghost_key(self.ghost_mode(), self.session.target))
+        if ghost is None or not self.main.ghost_var.get():
+            return
+        self.replay = GhostReplay(ghost)
+        self.ghost_ticker.start()
 
+    def update_ghost(self, now_ns: int) -> None:
+        """
+        Moves the race track markers to the user's and the ghost's progress. Called by
+        the ghost ticker on every frame of a ghost race, until the ghost has finished;
+        the user's marker then moves with the metrics ticker, see update_metrics().
 
+        :param now_ns: The time of the frame, in nanoseconds of time.perf_counter_ns().
+        :type now_ns: int
+        :return: None
+        """
+        ghost = self.replay.advance(now_ns / NS_PER_MS - self.session.started_at * 1000)
+        self.main.race_track.show(self.session.matcher.matched / len(self.session.target), ghost)
+        if self.replay.finished:
+            self.ghost_ticker.stop()
+
+    def update_metrics(self, now_ns: int) -> None:
+        """
+        Refreshes the typing speed labels while the test is running. This function is
+        called by the ticker on the Tk main thread at the configured refresh rate, and
+        takes the typed text from the typing session, which is only updated when the
+        input actually changes, instead of reading it back from the entry box. Once the
+        ghost of a race has finished, it also moves the user's marker on the race track.
+
+        :param now_ns: The time of the tick, in nanoseconds of time.perf_counter_ns().
+        :type now_ns: int
+        :return: None
+        """
+        self.show_metrics(self.session.metrics(now_ns / NS_PER_SECOND))
+        if self.replay is not None and self.replay.finished:
+            self.main.race_track.show(self.session.matcher.matched / len(self.session.target), 1.0)
+
+    def update_overlay(self, now_ns: int) -> None:
+        """
+        Refreshes the diagnostics overlay with the latest handler timings and counters.
+
+        :param now_ns: The time of the tick, in nanoseconds of time.perf_counter_ns().
+        :type now_ns: int
+        :return: None
+        """
+        self.overlay.config(text=DIAGNOSTICS.overlay_text())
+
+    def show_metrics(self, metrics: Metrics) -> None:
+        """
+        Updates the typing speed labels with the given metrics.
+
+        :param metrics: The typing speed to display.
+        :type metrics: Metrics
+        :return: None
+        """
+        shown = tuple(f"{value:.2f}" for value in metrics)
+        if shown == self.shown_metrics:
+            return
+        self.shown_metrics = shown
+        if DIAGNOSTICS is not None:
+            DIAGNOSTICS.count("label redraws")
+        self.main.cps_label.config(text=f"{shown[0]} Characters/second")
+        self.main.cpm_label.config(text=f"{shown[1]} Characters/minute")
+        self.main.wps_label.config(text=f"{shown[2]} Words/second")
+        self.main.wpm_label.config(text=f"{shown[3]} Words/minute")
+
+
+
+    def on_close(self) -> None:
+        """
+        Closes the window when the user asks to. The timers are stopped and the window
+        is destroyed straight away; the results still queued for the session history
+        are written after the main loop has returned.
+
+        :return: None
+        """
+        self.ticker.stop()
+        self.ghost_ticker.stop()
+        if self.overlay is not None:
+            self.overlay_ticker.stop()
+        self.destroy()
 
     def reset(self) -> None:
         """
         Resets the current typing test state and updates all related labels and fields to
         their initial state. This includes stopping ongoing timings, resetting counters,
         updating score and speed labels, clearing the user input, and setting new text for
-        the typing test.
+        the typing test: ten words in the words mode, or a passage of the selected mode,
+        which is shown in the passage view.
 
         :rtype: None
         :return: None
         """
-        self.running = False
-        self.counter = 0
+        self.ticker.stop()
+        self.ghost_ticker.stop()
+        self.replay = None
+        self.main.race_track.show(0.0, 0.0)
+        self.shown_metrics = None
         self.main.highscore_label.config(
             text=f"Your highscore: {self.highscore_cpm} CPM ({self.highscore_cps} CPS)\t{self.highscore_wpm} WPM ({self.highscore_wps} WPS)",
             foreground="black")
@@ -350,29 +700,63 @@ class App(GUI):
         self.main.cpm_label.config(text=f"0.00 Characters/minute")
         self.main.wps_label.config(text=f"0.00 Words/second")
         self.main.wpm_label.config(text=f"0.00 Words/minute")
-        self.main.test_text_label.config(text=word_picker())
-        self.main.final_score_label.config(text="")
+        mode = self.main.mode_var.get()
+        notice = ""
+        if mode != WORDS:
+            try:
+                passage = pick_passage(mode)
+            except FileNotFoundError:
+                notice = PASSAGE_NOTICE.format(mode)
+                mode = WORDS
+                self.main.mode_var.set(WORDS)
+        if mode != WORDS and self.main.passage_view is None:
+            self.main.create_passage_view().bind("<KeyPress>", self.on_passage_key)
+        self.main.show_passage(mode != WORDS)
+        if mode == WORDS:
+            lengths = WORD_LENGTHS[self.main.length_var.get()]
+            max_level = WORD_DIFFICULTIES[self.main.difficulty_var.get()]
+            filtered = (lengths is not None or max_level is not None) and not self.main.adaptive_var.get()
+            if filtered and self.main.language_var.get() == ENGLISH and pool_is_current() \
+                    and not filters_match(lengths, max_level):
+                notice = FILTER_NOTICE
+            self.main.test_text_label.config(text=word_picker(adaptive=self.main.adaptive_var.get(),
+                                                              lengths=lengths, max_level=max_level,
+                                                              language=self.main.language_var.get()))
+            if self.main.adaptive_var.get() and self.main.language_var.get() == ENGLISH and not ADAPTIVE_SAMPLER.ready:
+                notice = ADAPTIVE_NOTICE
+            self.session = TypingSession(self.main.test_text_label.cget('text'))
+        else:
+            self.session = TypingSession(passage)
+            self.main.passage_view.load(self.session, code=mode == CODE)
+        self.main.final_score_label.config(text=notice)
+        self.main.analysis_label.config(text="")
+        self.main.export_button.config(state="disabled")
+        self.analysis = None
         self.main.user_entry.delete(0, tk.END)
-        self.main.user_entry.focus_set()
+        self.main.user_entry.config(foreground=ENTRY_COLORS[CORRECT])
+        self.entry_state = CORRECT
+        if mode == WORDS:
+            self.main.user_entry.focus_set()
+        else:
+            self.main.passage_view.focus_set()
 
     def check_for_highscore(self) -> None:
         """
         Updates the highscores based on the current test results for characters per second (CPS),
         characters per minute (CPM), words per second (WPS), and words per minute (WPM).
         If a new highscore is achieved for either characters or words metrics, it updates the
-        corresponding records, modifies the final score display with appropriate messages,
-        and writes the updated highscores to a CSV file.
+        corresponding records and modifies the final score display with appropriate messages.
+        The completed test is queued for the session history, which writes it in the
+        background so the UI never waits for the disk.
 
-        :raises ValueError: If the text extracted from `cps_label`, `cpm_label`, `wps_label`,
-                            or `wpm_label` cannot be converted to a float.
         :type last_cps_score: float
-        :attr last_cps_score: Current CPS score extracted from the `main.cps_label`.
+        :attr last_cps_score: Final CPS score of the session, rounded to two decimals.
         :type last_cpm_score: float
-        :attr last_cpm_score: Current CPM score extracted from the `main.cpm_label`.
+        :attr last_cpm_score: Final CPM score of the session, rounded to two decimals.
         :type last_wps_score: float
-        :attr last_wps_score: Current WPS score extracted from the `main.wps_label`.
+        :attr last_wps_score: Final WPS score of the session, rounded to two decimals.
         :type last_wpm_score: float
-        :attr last_wpm_score: Current WPM score extracted from the `main.wpm_label`.
+        :attr last_wpm_score: Final WPM score of the session, rounded to two decimals.
 
         :param chars_is_new_highscore: Boolean flag indicating if a new highscore for
                                         characters (CPS/CPM) metrics has been achieved.
@@ -382,35 +766,35 @@ class App(GUI):
         :type words_is_new_highscore: bool
 
         :postcondition: Updates the `highscore_cps`, `highscore_cpm`, `highscore_wps`,
-                        and `highscore_wpm` attributes and saves them to `highscores`
-                        DataFrame when a new highscore is achieved.
+                        and `highscore_wpm` attributes when a new highscore is achieved.
         :postcondition: Updates the final score label in the `main` attribute with relevant
                         highscore messages.
-        :postcondition: Writes the updated `highscores` DataFrame back to a CSV file
-                        for persistent storage.
+        :postcondition: Queues the completed test for the session history, with its
+                        timeline as the new ghost if it is the fastest run on its kind of prompt.
+        :postcondition: Analyses the recorded keystrokes and shows the results below the
+                        final score.
 
         :return: None
         """
-        last_cps_score = float(self.main.cps_label.cget("text").split(" ")[0])
-        last_cpm_score = float(self.main.cpm_label.cget("text").split(" ")[0])
-        last_wps_score = float(self.main.wps_label.cget("text").split(" ")[0])
-        last_wpm_score = float(self.main.wpm_label.cget("text").split(" ")[0])
+        self.ghost_ticker.stop()
+        metrics = self.session.metrics(self.session.finished_at)
+        self.show_metrics(metrics)
+        last_cps_score = round(metrics.cps, 2)
+        last_cpm_score = round(metrics.cpm, 2)
+        last_wps_score = round(metrics.wps, 2)
+        last_wpm_score = round(metrics.wpm, 2)
 
         chars_is_new_highscore = False
         words_is_new_highscore = False
 
         if last_cps_score > self.highscore_cps:
             self.highscore_cps = last_cps_score
-            self.highscores.loc[0, "HIGHSCORE_CPS"] = self.highscore_cps
             self.highscore_cpm = last_cpm_score
-            self.highscores.loc[0, "HIGHSCORE_CPM"] = self.highscore_cpm
             chars_is_new_highscore = True
 
         if last_wps_score > self.highscore_wps:
             self.highscore_wps = last_wps_score
-            self.highscores.loc[0, "HIGHSCORE_WPS"] = self.highscore_wps
             self.highscore_wpm = last_wpm_score
-            self.highscores.loc[0, "HIGHSCORE_WPM"] = self.highscore_wpm
             words_is_new_highscore = True
 
         if chars_is_new_highscore and words_is_new_highscore:
@@ -436,12 +820,78 @@ class App(GUI):
                                           f"{last_cpm_score} CPM ({last_cps_score} CPS), "
                                           f"{last_wpm_score} WPM ({last_wps_score} WPS)",
                                              foreground="orange")
-        self.highscores.to_csv('assets/scores.csv')
+        from analytics import analyze
+        self.analysis = analyze(self.session.keystrokes)
+        self.main.analysis_label.config(text=self.analysis.summary())
+        self.main.export_button.config(state="normal")
+        bigrams = self.update_bigram_stats()
+        ghost = None
+        key = ghost_key(self.ghost_mode(), self.session.target)
+        if key not in self.ghosts or last_wpm_score > self.ghosts[key].wpm:
+            ghost = self.ghosts[key] = record_ghost(key, self.session, last_wpm_score)
+        self.store.record(SessionRecord(time.time(), len(self.session.text),
+                                        self.session.elapsed(self.session.finished_at),
+                                        Metrics(last_cps_score, last_cpm_score, last_wps_score, last_wpm_score),
+                                        bigrams=bigrams, ghost=ghost))
+
+    def update_bigram_stats(self) -> dict[str, tuple[int, float, int]]:
+        """
+        Adds the bigram statistics of the last completed test to the running totals and
+        passes the new practice scores to the adaptive word sampler, which only updates
+        the bigrams whose score changed.
+
+        :return: The bigram statistics of the last test, as (correctly typed count,
+            total latency in milliseconds, errors) per bigram.
+        :rtype: dict[str, tuple[int, float, int]]
+        """
+        analysis = self.analysis
+        bigrams = {}
+        for bigram in analysis.bigram_counts.keys() | analysis.bigram_errors.keys():
+            count = analysis.bigram_counts.get(bigram, 0)
+            bigrams[bigram] = (count, analysis.bigram_latency_ms.get(bigram, 0.0) * count,
+                               analysis.bigram_errors.get(bigram, 0))
+            total_count, total_ms, total_errors = self.bigram_stats.get(bigram, (0, 0.0, 0))
+            self.bigram_stats[bigram] = (total_count + bigrams[bigram][0], total_ms + bigrams[bigram][1],
+                                         total_errors + bigrams[bigram][2])
+        if not self.baseline_ms:
+            self.baseline_ms = baseline_latency(self.bigram_stats)
+        ADAPTIVE_SAMPLER.update(bigram_scores(self.bigram_stats, self.baseline_ms))
+        return bigrams
+
+    def export_analysis(self) -> None:
+        """
+        Asks for a file name and saves the keystroke analysis of the last completed test
+        to it as JSON, including the bigram latencies, error rates and all intervals.
+
+        :return: None
+        """
+        if self.analysis is None:
+            return
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")], initialfile="analysis.json")
+        if path:
+            with open(path, mode="w", encoding="utf-8") as file:
+                file.write(self.analysis.to_json())
 
 
 if __name__ == "__main__":
-    app = App("Typing Speed Test", (700, 500))
+    try:
+        app = App("Typing Speed Test", (700, 500), int(os.environ.get("TYPING_TEST_REFRESH_MS", REFRESH_MS)))
+    except FileNotFoundError as error:
+        print(f"{os.path.basename(error.filename or WORDS_PATH)} file not found!")
+        sys.exit(1)
+    if os.environ.get("TYPING_TEST_STARTUP_PROBE"):
+        # Used by benchmarks/bench_startup.py: report the first drawn frame and quit.
+        app.after_idle(app.after, 0, lambda: (print("first-frame", flush=True), app.destroy()))
     app.mainloop()
+    if not app.store.close(SHUTDOWN_TIMEOUT_S):
+        print(f"Gave up waiting for {app.store.pending} test results to be saved.", file=sys.stderr)
+    if os.environ.get("TYPING_TEST_TIMER_STATS"):
+        print(app.ticker.stats.summary())
+        print(app.ghost_ticker.stats.summary())
+    if DIAGNOSTICS is not None:
+        print("diagnostics written to " + " and ".join(DIAGNOSTICS.dump(DIAGNOSTICS_DIR)))
 
 
 
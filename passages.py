@@ -0,0 +1,310 @@
+import bisect
+import glob
+import os
+import random
+import tkinter as tk
+from typing import Optional
+
+from session import BACKSPACE, KeyEvent, TypingSession
+
+WORDS = "Words"
+PARAGRAPH = "Paragraph"
+BOOK = "Book excerpt"
+CODE = "Code"
+MODES = (WORDS, PARAGRAPH, BOOK, CODE)
+
+PARAGRAPHS_PATH = "./assets/paragraphs.txt"
+BOOKS_PATTERN = "./assets/books/*.txt"
+CODE_PATTERN = "./*.py"
+
+PASSAGE_CHARS = {PARAGRAPH: 600, BOOK: 2000, CODE: 1200}
+SEPARATOR = b"\n\n"
+TAB_WIDTH = 4
+# Random excerpts to try before giving up on sources that hold no text, e.g.
+# whitespace-only files.
+PICK_ATTEMPTS = 20
+
+
+def mode_sources(mode: str) -> list[str]:
+    """
+    :param mode: One of PARAGRAPH, BOOK or CODE.
+    :type mode: str
+    :return: The non-empty files passages of the given mode are taken from.
+    :rtype: list[str]
+    """
+    if mode == PARAGRAPH:
+        paths = [PARAGRAPHS_PATH] if os.path.exists(PARAGRAPHS_PATH) else []
+    elif mode == BOOK:
+        paths = sorted(glob.glob(BOOKS_PATTERN))
+    elif mode == CODE:
+        paths = sorted(glob.glob(CODE_PATTERN))
+    else:
+        return []
+    return [path for path in paths if os.path.getsize(path)]
+
+
+def available_modes() -> list[str]:
+    """
+    :return: The test modes that have source files, WORDS always included.
+    :rtype: list[str]
+    """
+    return [mode for mode in MODES if mode == WORDS or mode_sources(mode)]
+
+
+def read_excerpt(path: str, max_chars: int) -> str:
+    """
+    Reads a random excerpt of up to max_chars characters from a text file without
+    reading the rest of the file, so passages can be taken from arbitrarily large
+    books or source trees. The excerpt starts and, where possible, ends at a blank
+    line, i.e. at a paragraph or code block boundary.
+
+    :param path: Path to a UTF-8 text file.
+    :type path: str
+    :param max_chars: Maximum length of the excerpt, in characters.
+    :type max_chars: int
+    :return: The excerpt.
+    :rtype: str
+    """
+    size = os.path.getsize(path)
+    window = max_chars * 2
+    offset = random.randrange(max(1, size - window))
+    with open(path, mode="rb") as file:
+        file.seek(offset)
+        chunk = file.read(window)
+    if offset:
+        boundary = chunk.find(SEPARATOR)
+        if boundary != -1:
+            chunk = chunk[boundary + len(SEPARATOR):]
+    text = chunk.decode("utf-8", errors="ignore")
+    if len(text) > max_chars:
+        end = text.rfind(SEPARATOR.decode(), 0, max_chars)
+        text = text[:end] if end > 0 else text[:max_chars]
+    return text
+
+
+def normalise(text: str, code: bool) -> str:
+    """
+    Prepares an excerpt for typing. Prose is collapsed into a single line of words
+    separated by single spaces; code keeps its lines and indentation, with tabs
+    expanded and trailing whitespace removed.
+
+    :param text: The raw excerpt.
+    :type text: str
+    :param code: Whether the excerpt is source code.
+    :type code: bool
+    :return: The text to type.
+    :rtype: str
+    """
+    if not code:
+        return " ".join(text.split())
+    lines = [line.expandtabs(TAB_WIDTH).rstrip() for line in text.splitlines()]
+    return "\n".join(lines).strip("\n")
+
+
+def pick_passage(mode: str) -> str:
+    """
+    Picks a random passage for the given mode, trying up to PICK_ATTEMPTS excerpts
+    to find one that is not blank.
+
+    :param mode: One of PARAGRAPH, BOOK or CODE.
+    :type mode: str
+    :raises FileNotFoundError: If the mode has no source files, or none of the
+        excerpts tried holds any text.
+    :return: The text to type.
+    :rtype: str
+    """
+    sources = mode_sources(mode)
+    if not sources:
+        raise FileNotFoundError(f"no source files for the {mode} mode")
+    for _ in range(PICK_ATTEMPTS):
+        text = normalise(read_excerpt(random.choice(sources), PASSAGE_CHARS[mode]), mode == CODE)
+        if text:
+            return text
+    raise FileNotFoundError(f"no text in the source files for the {mode} mode")
+
+
+def line_starts(text: str, width: int, code: bool) -> list[int]:
+    """
+    Splits a passage into display lines. Code is split at its newlines, which stay at
+    the end of their line; prose is wrapped at spaces to lines of at most `width`
+    characters, each keeping its trailing space, so every character of the passage
+    belongs to exactly one display line.
+
+    :param text: The passage.
+    :type text: str
+    :param width: Maximum length of a wrapped prose line.
+    :type width: int
+    :param code: Whether the passage is source code.
+    :type code: bool
+    :return: The position in the passage at which every display line starts.
+    :rtype: list[int]
+    """
+    starts = [0]
+    if code:
+        position = text.find("\n")
+        while position != -1:
+            starts.append(position + 1)
+            position = text.find("\n", position + 1)
+        return starts
+    while starts[-1] + width < len(text):
+        start = starts[-1]
+        space = text.rfind(" ", start, start + width)
+        starts.append(space + 1 if space > start else start + width)
+    return starts
+
+
+def key_for(event: tk.Event) -> Optional[str]:
+    """
+    Translates a Tk key event into the characters it types into a passage. An input
+    method may commit several characters, e.g. a Japanese word, in one event.
+
+    :param event: A <KeyPress> event.
+    :type event: tk.Event
+    :return: The typed characters, BACKSPACE, or None for keys that type nothing.
+    :rtype: str or None
+    """
+    if event.keysym == "BackSpace":
+        return BACKSPACE
+    if event.keysym in ("Return", "KP_Enter"):
+        return "\n"
+    if event.keysym == "Tab":
+        return " " * TAB_WIDTH
+    if event.char and event.char.isprintable():
+        return event.char
+    return None
+
+
+class PassageView(tk.Text):
+    """
+    Virtualised view of a long passage that is typed over in place.
+
+    Only `visible_lines` display lines of the passage are ever inserted into the
+    widget; when the cursor moves close to the bottom (or above the top) of that
+    window, the window is re-rendered around the cursor line. Correctly typed and
+    mistyped characters are marked with the "correct" and "error" tags, which are
+    added or removed one character per keystroke, so memory use and redraw cost
+    stay flat however long the passage is.
+
+    :ivar visible_lines: Number of display lines kept in the widget.
+    :type visible_lines: int
+    :ivar line_width: Width in characters at which prose is wrapped.
+    :type line_width: int
+    :ivar session: The typing test shown, or None before load() is called.
+    :type session: TypingSession or None
+    :ivar starts: Position in the passage at which every display line starts.
+    :type starts: list[int]
+    :ivar first_line: Index of the display line shown at the top of the window.
+    :type first_line: int
+    :ivar code: Whether the passage is source code, which keeps its own line breaks.
+    :type code: bool
+    """
+
+    def __init__(self, parent: tk.Misc, visible_lines: int = 8, line_width: int = 60, **kwargs) -> None:
+        super().__init__(parent, height=visible_lines, width=line_width + 1, wrap="none", cursor="arrow", **kwargs)
+        self.visible_lines = visible_lines
+        self.line_width = line_width
+        self.session: Optional[TypingSession] = None
+        self.starts: list[int] = [0]
+        self.first_line = 0
+        self.code = False
+        self._cursor: Optional[str] = None
+        self.tag_configure("correct", foreground="green")
+        self.tag_configure("error", foreground="red", background="#ffd6d6")
+        self.tag_configure("cursor", underline=True, background="#dde8ff")
+        self.tag_raise("cursor")
+
+    def load(self, session: TypingSession, code: bool) -> None:
+        """
+        Shows a new passage, scrolled to its beginning.
+
+        :param session: The typing test whose target is the passage.
+        :type session: TypingSession
+        :param code: Whether the passage is source code.
+        :type code: bool
+        :return: None
+        """
+        self.session = session
+        self.code = code
+        self.starts = line_starts(session.target, self.line_width, code)
+        self.render(0)
+
+    def type_key(self, event: KeyEvent) -> bool:
+        """
+        Feeds a keystroke to the session and updates the marks of the affected character.
+
+        :param event: The keystroke.
+        :type event: KeyEvent
+        :return: True if this keystroke completed the passage.
+        :rtype: bool
+        """
+        matcher = self.session.matcher
+        before = matcher.typed
+        completed = self.session.feed(event)
+        after = matcher.typed
+        if after > before:
+            self._mark(before, "correct" if matcher.matched > before else "error")
+        elif after < before:
+            index = self._index(after)
+            if index is not None:
+                self.tag_remove("correct", index)
+                self.tag_remove("error", index)
+        self._move_cursor(after)
+        return completed
+
+    def render(self, first_line: int) -> None:
+        """
+        Replaces the window with `visible_lines` display lines starting at `first_line`
+        and re-applies the marks of the typed characters inside it.
+
+        :param first_line: Index of the display line to show at the top.
+        :type first_line: int
+        :return: None
+        """
+        self.first_line = first_line
+        target = self.session.target
+        last_line = min(first_line + self.visible_lines, len(self.starts))
+        window_start = self.starts[first_line]
+        window_end = self.starts[last_line] if last_line < len(self.starts) else len(target)
+        lines = []
+        for line in range(first_line, last_line):
+            end = self.starts[line + 1] if line + 1 < len(self.starts) else len(target)
+            lines.append(target[self.starts[line]:end].rstrip("\n") if self.code else target[self.starts[line]:end])
+        self.delete("1.0", "end")
+        self.insert("1.0", "\n".join(lines))
+        self._cursor = None
+        matcher = self.session.matcher
+        for tag, start, end in (("correct", 0, matcher.matched), ("error", matcher.matched, matcher.typed)):
+            start, end = max(start, window_start), min(end, window_end)
+            if start < end:
+                self.tag_add(tag, self._index(start), self._index(end - 1) + " + 1 chars")
+        self._move_cursor(matcher.typed)
+
+    def _line_of(self, position: int) -> int:
+        return bisect.bisect_right(self.starts, position) - 1
+
+    def _index(self, position: int) -> Optional[str]:
+        line = self._line_of(position)
+        if not self.first_line <= line < self.first_line + self.visible_lines:
+            return None
+        return f"{line - self.first_line + 1}.{position - self.starts[line]}"
+
+    def _mark(self, position: int, tag: str) -> None:
+        index = self._index(position)
+        if index is not None:
+            self.tag_add(tag, index)
+
+    def _move_cursor(self, position: int) -> None:
+        line = self._line_of(min(position, max(len(self.session.target) - 1, 0)))
+        if line < self.first_line or line >= self.first_line + self.visible_lines - 2:
+            first_line = max(0, min(line - 1, len(self.starts) - self.visible_lines))
+            if first_line != self.first_line:
+                self.render(first_line)
+                return
+        index = self._index(position)
+        if index == self._cursor:
+            return
+        if self._cursor is not None:
+            self.tag_remove("cursor", self._cursor)
+        if index is not None:
+            self.tag_add("cursor", index)
+        self._cursor = index
@@ -0,0 +1,274 @@
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from session import BACKSPACE, CORRECTION, KeyEvent, Metrics, TypingSession, ZERO_METRICS
+from storage import SessionRecord, connect, insert_records
+
+CHUNK_BYTES = 4 * 1024 * 1024
+LEADERBOARD_SIZE = 10
+
+
+class Chunk(NamedTuple):
+    """
+    A range of whole lines of a log file, scored by one worker task.
+
+    :ivar path: Path to the log file.
+    :type path: str
+    :ivar start: Byte offset of the first line.
+    :type start: int
+    :ivar end: Byte offset just past the last line.
+    :type end: int
+    """
+    path: str
+    start: int
+    end: int
+
+
+class Scores(NamedTuple):
+    """
+    Aggregated scores of a set of sessions, as produced by the map step and merged
+    by the reduce step.
+
+    :ivar sessions: Number of sessions read.
+    :type sessions: int
+    :ivar completed: Number of sessions in which the target was typed completely.
+    :type completed: int
+    :ivar invalid: Number of lines that could not be parsed.
+    :type invalid: int
+    :ivar skipped_keys: Number of keystrokes skipped because their key is not a single
+        character or their time is not a finite number.
+    :type skipped_keys: int
+    :ivar bests: Highscores of every user over their completed sessions; as in the app,
+        the CPM belongs to the session with the best CPS and the WPM to the one with the best WPS.
+    :type bests: dict[str, Metrics]
+    :ivar counts: Number of completed sessions of every user.
+    :type counts: dict[str, int]
+    :ivar records: The completed sessions, for the consolidated store, or None when not kept.
+    :type records: list[SessionRecord] or None
+    """
+    sessions: int
+    completed: int
+    invalid: int
+    skipped_keys: int
+    bests: dict[str, Metrics]
+    counts: dict[str, int]
+    records: Optional[list[SessionRecord]]
+
+
+def session_log_line(session: TypingSession, user: str = "", finished_at: Optional[float] = None) -> str:
+    """
+    Encodes a session's keystrokes as one line of a keystroke log.
+
+    Keystroke logs are JSON Lines files with one session per line:
+
+        {"user": "ada", "target": "the words to type", "finished_at": 1700000000.0,
+         "keys": [[0.0, "t"], [0.21, "h"], [0.35, "\\b"], ...]}
+
+    where every key is a [time in seconds, key] pair, the key being a single
+    character or "\\b" for backspace, as fed to TypingSession; other keys are
+    skipped when re-scoring, like the server rejects them. "user" and
+    "finished_at" are optional.
+
+    :param session: A session fed one key at a time.
+    :type session: TypingSession
+    :param user: Name of the user who took the test.
+    :type user: str
+    :param finished_at: Wall-clock time at which the test was completed, as a Unix timestamp.
+    :type finished_at: float or None
+    :return: The JSON line, without a trailing newline.
+    :rtype: str
+    """
+    log = session.keystrokes
+    keys = [[timestamp, BACKSPACE if typed == CORRECTION else chr(typed)]
+            for timestamp, typed in zip(log.times, log.typed)]
+    return json.dumps({"user": user, "target": session.target, "finished_at": finished_at, "keys": keys},
+                      separators=(",", ":"), ensure_ascii=False)
+
+
+def split_chunks(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Chunk]:
+    """
+    Splits a log file into chunks of about chunk_bytes at line boundaries, reading
+    only a line around every boundary, so workers can read their chunks in parallel.
+
+    :param path: Path to the log file.
+    :type path: str
+    :param chunk_bytes: Approximate size of a chunk.
+    :type chunk_bytes: int
+    :return: The chunks, in file order.
+    :rtype: Iterator[Chunk]
+    """
+    size = os.path.getsize(path)
+    start = 0
+    with open(path, mode="rb") as file:
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            end = min(file.tell(), size)
+            yield Chunk(path, start, end)
+            start = end
+
+
+def is_time(value: object) -> bool:
+    """
+    :param value: A time read from a log line.
+    :type value: object
+    :return: Whether the value is a finite number of seconds; json.loads also accepts
+        NaN and Infinity, which would make every metric of the session NaN.
+    :rtype: bool
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def merge_best(best: Metrics, metrics: Metrics) -> Metrics:
+    return Metrics(*(metrics[:2] if metrics.cps > best.cps else best[:2]),
+                   *(metrics[2:] if metrics.wps > best.wps else best[2:]))
+
+
+def score_chunk(chunk: Chunk, keep_records: bool = False) -> Scores:
+    """
+    Map step: replays and scores every session in a chunk with the same
+    TypingSession engine and rounding as the app.
+
+    :param chunk: The lines to score.
+    :type chunk: Chunk
+    :param keep_records: Whether to return the completed sessions for the store.
+    :type keep_records: bool
+    :return: The aggregated scores of the chunk.
+    :rtype: Scores
+    """
+    with open(chunk.path, mode="rb") as file:
+        file.seek(chunk.start)
+        lines = file.read(chunk.end - chunk.start).splitlines()
+    sessions = completed = invalid = skipped_keys = 0
+    bests: dict[str, Metrics] = {}
+    counts: dict[str, int] = {}
+    records = [] if keep_records else None
+    for line in lines:
+        if not line.strip():
+            continue
+        sessions += 1
+        try:
+            entry = json.loads(line)
+            user = entry.get("user") or ""
+            if not isinstance(user, str):
+                raise TypeError("user must be a string")
+            session = TypingSession(entry["target"])
+            for timestamp, key in entry["keys"]:
+                if not isinstance(key, str) or len(key) != 1 or not is_time(timestamp):
+                    skipped_keys += 1
+                    continue
+                session.feed(KeyEvent(timestamp, key))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            invalid += 1
+            continue
+        if not session.finished:
+            continue
+        completed += 1
+        metrics = Metrics(*(round(value, 2) for value in session.metrics(session.finished_at)))
+        bests[user] = merge_best(bests.get(user, ZERO_METRICS), metrics)
+        counts[user] = counts.get(user, 0) + 1
+        if keep_records:
+            finished_at = entry.get("finished_at")
+            records.append(SessionRecord(finished_at if is_time(finished_at) else 0.0, len(session.target),
+                                         session.elapsed(session.finished_at), metrics, source="rescore", user=user))
+    return Scores(sessions, completed, invalid, skipped_keys, bests, counts, records)
+
+
+def merge_scores(total: Scores, part: Scores) -> Scores:
+    """
+    Reduce step: merges the scores of a chunk into the running total. The records
+    of the chunk are not kept in the total, as they are written out as they arrive.
+
+    :param total: The scores so far.
+    :type total: Scores
+    :param part: The scores of one chunk.
+    :type part: Scores
+    :return: The merged scores.
+    :rtype: Scores
+    """
+    for user, metrics in part.bests.items():
+        total.bests[user] = merge_best(total.bests.get(user, ZERO_METRICS), metrics)
+        total.counts[user] = total.counts.get(user, 0) + part.counts[user]
+    return Scores(total.sessions + part.sessions, total.completed + part.completed, total.invalid + part.invalid,
+                  total.skipped_keys + part.skipped_keys, total.bests, total.counts, None)
+
+
+def leaderboard(scores: Scores, size: int = LEADERBOARD_SIZE) -> list[tuple[str, Metrics]]:
+    """
+    :param scores: Aggregated scores.
+    :type scores: Scores
+    :param size: Number of entries.
+    :type size: int
+    :return: The users with the best WPM and their highscores, best first.
+    :rtype: list[tuple[str, Metrics]]
+    """
+    return sorted(scores.bests.items(), key=lambda item: (-item[1].wpm, -item[1].cpm, item[0]))[:size]
+
+
+def rescore(paths: Iterable[str], workers: int, db_path: Optional[str] = None,
+            chunk_bytes: int = CHUNK_BYTES) -> Scores:
+    """
+    Scores every session in the given log files across a pool of worker processes
+    and merges the results. Workers read their own chunks of the files, so only
+    file offsets and aggregated results cross process boundaries. With db_path,
+    every completed session is also written to that session history database as
+    its chunk's results arrive, in one transaction per chunk; a chunk that cannot be
+    written is reported on stderr and the run carries on.
+
+    :param paths: Paths to keystroke log files.
+    :type paths: Iterable[str]
+    :param workers: Number of worker processes.
+    :type workers: int
+    :param db_path: Session history database to write the completed sessions to, or None.
+    :type db_path: str or None
+    :param chunk_bytes: Approximate size of the chunk scored by one task.
+    :type chunk_bytes: int
+    :return: The merged scores of all sessions.
+    :rtype: Scores
+    """
+    chunks = [chunk for path in paths for chunk in split_chunks(path, chunk_bytes)]
+    total = Scores(0, 0, 0, 0, {}, {}, None)
+    connection = connect(db_path) if db_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for part in executor.map(score_chunk, chunks, [connection is not None] * len(chunks)):
+                if connection is not None and part.records:
+                    try:
+                        insert_records(connection, part.records)
+                    except sqlite3.Error as error:
+                        print(f"Could not save {len(part.records)} sessions to {db_path}: {error}", file=sys.stderr)
+                total = merge_scores(total, part)
+    finally:
+        if connection is not None:
+            connection.close()
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-scores recorded typing sessions and prints a leaderboard.")
+    parser.add_argument("logs", nargs="+", help="keystroke log files (JSON Lines)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--db", help="session history database to write the re-scored sessions to")
+    parser.add_argument("--top", type=int, default=LEADERBOARD_SIZE, help="number of leaderboard entries")
+    args = parser.parse_args()
+
+    begin = time.perf_counter()
+    scores = rescore(args.logs, args.workers, args.db)
+    elapsed = time.perf_counter() - begin
+    print(f"{scores.sessions} sessions ({scores.completed} completed, {scores.invalid} invalid, "
+          f"{scores.skipped_keys} keys skipped) "
+          f"from {len(scores.bests)} users in {elapsed:.1f} s ({scores.sessions / elapsed:.0f} sessions/s)")
+    for rank, (user, best) in enumerate(leaderboard(scores, args.top), 1):
+        print(f"{rank:>3}. {user or '(app)':<20} {best.wpm:>8.2f} WPM ({best.wps} WPS)  "
+              f"{best.cpm:>8.2f} CPM ({best.cps} CPS)  {scores.counts[user]} tests")
+
+
+if __name__ == "__main__":
+    main()
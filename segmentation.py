@@ -0,0 +1,184 @@
+import bisect
+import unicodedata
+from array import array
+
+ZWJ = 0x200D
+# Viramas that join two consonants into one conjunct cluster (Unicode 15.1, GB9c):
+# Devanagari, Bengali, Gujarati, Oriya, Telugu and Malayalam.
+INDIC_LINKERS = frozenset((0x094D, 0x09CD, 0x0ACD, 0x0B4D, 0x0C4D, 0x0D4D))
+# Scripts written without spaces between words, where every grapheme cluster is
+# counted as a word, as typing tests in these languages usually do.
+SPACELESS_RANGES = ((0x0E00, 0x0EFF), (0x1000, 0x109F), (0x1780, 0x17FF), (0x3040, 0x30FF), (0x31F0, 0x31FF),
+                    (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0x20000, 0x2FA1F))
+
+HANGUL_L = ((0x1100, 0x115F), (0xA960, 0xA97F))
+HANGUL_V = ((0x1160, 0x11A7), (0xD7B0, 0xD7C6))
+HANGUL_T = ((0x11A8, 0x11FF), (0xD7CB, 0xD7FB))
+HANGUL_SYLLABLES = (0xAC00, 0xD7A3)
+
+
+def in_ranges(code: int, ranges: tuple[tuple[int, int], ...]) -> bool:
+    return any(low <= code <= high for low, high in ranges)
+
+
+def hangul_type(code: int) -> str:
+    if in_ranges(code, HANGUL_L):
+        return "L"
+    if in_ranges(code, HANGUL_V):
+        return "V"
+    if in_ranges(code, HANGUL_T):
+        return "T"
+    if HANGUL_SYLLABLES[0] <= code <= HANGUL_SYLLABLES[1]:
+        return "LV" if (code - HANGUL_SYLLABLES[0]) % 28 == 0 else "LVT"
+    return ""
+
+
+def is_extend(code: int, char: str) -> bool:
+    return (unicodedata.category(char) in ("Mn", "Me", "Mc") or code == ZWJ or 0xFE00 <= code <= 0xFE0F
+            or 0x1F3FB <= code <= 0x1F3FF or 0xE0020 <= code <= 0xE007F or 0xE0100 <= code <= 0xE01EF)
+
+
+def is_pictographic(code: int, char: str) -> bool:
+    return code >= 0x2600 and unicodedata.category(char) == "So"
+
+
+def grapheme_ends(text: str) -> array:
+    """
+    Splits text into grapheme clusters, i.e. the characters a user perceives and
+    types as one, following a simplified version of the extended grapheme cluster
+    rules of Unicode Standard Annex #29: CR LF, combining and spacing marks,
+    variation selectors and emoji modifiers, emoji ZWJ sequences, regional
+    indicator pairs (flags), Hangul syllable sequences and Indic conjuncts.
+
+    :param text: The text to split.
+    :type text: str
+    :return: The position just past the end of every cluster, in code points.
+    :rtype: array.array
+    """
+    ends = array("I")
+    previous = None
+    previous_hangul = ""
+    regional_run = 0
+    linked = False
+    for position, char in enumerate(text):
+        code = ord(char)
+        hangul = hangul_type(code) if 0x1100 <= code <= 0xD7FB else ""
+        regional = 0x1F1E6 <= code <= 0x1F1FF
+        join = False
+        if previous is not None:
+            if previous == 0x0D and code == 0x0A:
+                join = True
+            elif previous in (0x0A, 0x0D) or code in (0x0A, 0x0D):
+                join = False
+            elif is_extend(code, char):
+                join = True
+            elif previous == ZWJ and is_pictographic(code, char):
+                join = True
+            elif regional and regional_run % 2 == 1:
+                join = True
+            elif hangul and previous_hangul and (
+                    previous_hangul == "L" and hangul in ("L", "V", "LV", "LVT")
+                    or previous_hangul in ("LV", "V") and hangul in ("V", "T")
+                    or previous_hangul in ("LVT", "T") and hangul == "T"):
+                join = True
+            elif linked and unicodedata.category(char) == "Lo":
+                join = True
+        if not join and position:
+            ends.append(position)
+        if code in INDIC_LINKERS:
+            linked = True
+        elif not (join and is_extend(code, char)):
+            linked = False
+        regional_run = regional_run + 1 if regional else 0
+        previous, previous_hangul = code, hangul
+    if text:
+        ends.append(len(text))
+    return ends
+
+
+def word_starts(text: str, ends: array) -> array:
+    """
+    Finds where words start: at the beginning of the text, after every space, and
+    at every grapheme cluster of a script written without spaces (Chinese,
+    Japanese, Thai, Lao, Khmer and Myanmar). For text without such scripts, the
+    number of word starts up to a position equals the number of words the app has
+    always counted by splitting the typed text on single spaces.
+
+    :param text: The text to split.
+    :type text: str
+    :param ends: Its grapheme cluster ends, see grapheme_ends().
+    :type ends: array.array
+    :return: The position of the first code point of every word.
+    :rtype: array.array
+    """
+    starts = array("I", [0])
+    start = 0
+    for end in ends:
+        if start and (text[start - 1] == " " or in_ranges(ord(text[start]), SPACELESS_RANGES)):
+            starts.append(start)
+        start = end
+    return starts
+
+
+class Segmentation:
+    """
+    Grapheme clusters and words of a prompt, computed once so that counting the
+    clusters and words in any typed prefix costs O(log n) instead of rescanning it.
+
+    ASCII prompts take a fast path: every character is its own cluster, so only
+    the positions following spaces are stored.
+
+    :ivar text: The segmented prompt.
+    :type text: str
+    :ivar ends: Position just past the end of every grapheme cluster, or None when
+        every code point is a cluster of its own.
+    :type ends: array.array or None
+    :ivar starts: Position of the first code point of every word.
+    :type starts: array.array
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        if text.isascii():
+            self.ends = None
+            self.starts = array("I", [0])
+            space = text.find(" ")
+            while space != -1:
+                self.starts.append(space + 1)
+                space = text.find(" ", space + 1)
+        else:
+            self.ends = grapheme_ends(text)
+            self.starts = word_starts(text, self.ends)
+
+    def graphemes(self, length: int) -> int:
+        """
+        :param length: Length of a prefix of the prompt, in code points.
+        :type length: int
+        :return: Number of complete grapheme clusters in the prefix.
+        :rtype: int
+        """
+        if self.ends is None:
+            return min(length, len(self.text))
+        return bisect.bisect_right(self.ends, length)
+
+    def words(self, length: int) -> int:
+        """
+        :param length: Length of a prefix of the prompt, in code points.
+        :type length: int
+        :return: Number of words begun in the prefix, counting an empty prefix as one
+            word like splitting the empty string does.
+        :rtype: int
+        """
+        return bisect.bisect_right(self.starts, length)
+
+    def cluster(self, position: int) -> tuple[int, int]:
+        """
+        :param position: A position in the prompt, in code points.
+        :type position: int
+        :return: Start and end of the grapheme cluster containing the position.
+        :rtype: tuple[int, int]
+        """
+        if self.ends is None:
+            return position, position + 1
+        index = bisect.bisect_right(self.ends, position)
+        return self.ends[index - 1] if index else 0, self.ends[index] if index < len(self.ends) else len(self.text)
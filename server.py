@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from session import KeyEvent, Metrics, TypingSession, ZERO_METRICS
+from storage import SessionRecord, SessionStore
+from words import word_picker
+
+WRITE_BUFFER_LIMIT = 64 * 1024
+MAX_WORDS = 200
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class Client:
+    """
+    State of one connected candidate.
+
+    :ivar user: Name the client introduced itself with, or None before the "hello" message.
+    :type user: str or None
+    :ivar session: The typing test in progress, or None between tests.
+    :type session: TypingSession or None
+    :ivar seq: Number of keystrokes acknowledged in the current test.
+    :type seq: int
+    """
+
+    def __init__(self) -> None:
+        self.user: Optional[str] = None
+        self.session: Optional[TypingSession] = None
+        self.seq = 0
+
+
+class TypingServer:
+    """
+    Headless, multi-user typing test server speaking newline-delimited JSON over TCP.
+
+    Every line a client sends is one JSON object with a "type" field, and every reply
+    is one JSON object on its own line:
+
+    - {"type": "hello", "user": name} -> {"type": "welcome", "user": name, "highscores": {...}}
+    - {"type": "start", "words": k} -> {"type": "prompt", "text": ...}, with words picked by word_picker
+    - {"type": "key", "key": char, "t": seconds} -> {"type": "ack", "seq": n, "state": ...}, where
+      "key" is a single character or "\\b" for backspace and the optional "t" is the client's
+      monotonic keystroke time, a finite number (the server's receive time is used without
+      it). The keystroke
+      that completes the prompt is followed by {"type": "result", "metrics": {...},
+      "new_highscore": {"chars": bool, "words": bool}, "highscores": {...}}.
+
+    Lines that are not valid UTF-8 JSON objects are answered with {"type": "error", ...};
+    a line longer than the stream limit gets an error reply and closes the connection.
+
+    Tests are scored by the same TypingSession engine as the desktop app. All clients
+    are served by a single asyncio event loop; completed tests are handed to the
+    session store's background writer and highscores are loaded on a reader thread,
+    so disk I/O never blocks the loop.
+
+    :ivar store: Session history to record completed tests in and load highscores from, or None.
+    :type store: SessionStore or None
+    :ivar highscores: Cached highscores of every user seen since the server started.
+    :type highscores: dict[str, Metrics]
+    :ivar connections: Number of currently connected clients.
+    :type connections: int
+    :ivar reader: Single thread running the session store's highscore queries.
+    :type reader: ThreadPoolExecutor
+    """
+
+    def __init__(self, store: Optional[SessionStore] = None) -> None:
+        self.store = store
+        self.highscores: dict[str, Metrics] = {}
+        self.connections = 0
+        self.reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TypingServer reader")
+
+    async def receive(self, client: Client, message: dict) -> list[dict]:
+        """
+        Handles one message from a client. "hello" messages may wait for the user's
+        highscores to be loaded; all others are handled synchronously by dispatch().
+
+        :param client: The client the message came from.
+        :type client: Client
+        :param message: The decoded message.
+        :type message: dict
+        :return: The replies to send back, in order.
+        :rtype: list[dict]
+        """
+        if message.get("type") == "hello":
+            return await self.on_hello(client, message)
+        return self.dispatch(client, message)
+
+    def dispatch(self, client: Client, message: dict) -> list[dict]:
+        """
+        Handles one message from a client other than "hello".
+
+        :param client: The client the message came from.
+        :type client: Client
+        :param message: The decoded message.
+        :type message: dict
+        :return: The replies to send back, in order.
+        :rtype: list[dict]
+        """
+        kind = message.get("type")
+        if kind == "key":
+            return self.on_key(client, message)
+        if kind == "start":
+            return self.on_start(client, message)
+        return [{"type": "error", "message": f"unknown message type: {kind!r}"}]
+
+    async def on_hello(self, client: Client, message: dict) -> list[dict]:
+        user = message.get("user")
+        if not isinstance(user, str) or not user:
+            return [{"type": "error", "message": "hello needs a non-empty user name"}]
+        if user not in self.highscores:
+            highscores = ZERO_METRICS
+            if self.store is not None:
+                highscores = await asyncio.get_running_loop().run_in_executor(self.reader, self.store.highscores, user)
+            self.highscores.setdefault(user, highscores)
+        client.user = user
+        return [{"type": "welcome", "user": user, "highscores": self.highscores[user]._asdict()}]
+
+    def on_start(self, client: Client, message: dict) -> list[dict]:
+        if client.user is None:
+            return [{"type": "error", "message": "say hello first"}]
+        words = message.get("words", 10)
+        if not isinstance(words, int) or isinstance(words, bool) or not 1 <= words <= MAX_WORDS:
+            return [{"type": "error", "message": f"words must be between 1 and {MAX_WORDS}"}]
+        try:
+            client.session = TypingSession(word_picker(words))
+        except FileNotFoundError:
+            return [{"type": "error", "message": "the word list is missing on the server"}]
+        client.seq = 0
+        return [{"type": "prompt", "text": client.session.target}]
+
+    def on_key(self, client: Client, message: dict) -> list[dict]:
+        session = client.session
+        if session is None or session.finished:
+            return [{"type": "error", "message": "no test in progress"}]
+        key = message.get("key")
+        if not isinstance(key, str) or len(key) != 1:
+            return [{"type": "error", "message": "key must be a single character or \\b"}]
+        timestamp = message.get("t")
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        elif not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool) or not math.isfinite(timestamp):
+            return [{"type": "error", "message": "t must be a finite number of seconds"}]
+        completed = session.feed(KeyEvent(timestamp, key))
+        client.seq += 1
+        replies = [{"type": "ack", "seq": client.seq, "state": session.state}]
+        if completed:
+            replies.append(self.finish(client))
+        return replies
+
+    def finish(self, client: Client) -> dict:
+        """
+        Scores a completed test, updates the user's highscores like the desktop app does
+        and queues the test for the session store.
+
+        :param client: The client that completed its test.
+        :type client: Client
+        :return: The "result" message.
+        :rtype: dict
+        """
+        session = client.session
+        metrics = Metrics(*(round(value, 2) for value in session.metrics(session.finished_at)))
+        best = self.highscores[client.user]
+        chars_is_new_highscore = metrics.cps > best.cps
+        words_is_new_highscore = metrics.wps > best.wps
+        self.highscores[client.user] = Metrics(*(best[:2] if not chars_is_new_highscore else metrics[:2]),
+                                               *(best[2:] if not words_is_new_highscore else metrics[2:]))
+        if self.store is not None:
+            self.store.record(SessionRecord(time.time(), len(session.target), session.elapsed(session.finished_at),
+                                            metrics, source="server", user=client.user))
+        return {"type": "result", "metrics": metrics._asdict(),
+                "new_highscore": {"chars": chars_is_new_highscore, "words": words_is_new_highscore},
+                "highscores": self.highscores[client.user]._asdict()}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves one client connection until it disconnects.
+
+        :return: None
+        """
+        client = Client()
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(encode({"type": "error", "message": "line too long"}))
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    replies = [{"type": "error", "message": "invalid JSON"}]
+                else:
+                    replies = await self.receive(client, message) if isinstance(message, dict) else \
+                        [{"type": "error", "message": "messages must be JSON objects"}]
+                writer.write(b"".join(encode(reply) for reply in replies))
+                if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """
+        Listens for clients until cancelled. The bound address is printed once listening,
+        which lets callers pass port 0 and read back the port that was picked.
+
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        address = server.sockets[0].getsockname()
+        print(f"listening on {address[0]}:{address[1]}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless multi-user typing test server (newline-delimited JSON over TCP).")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on, 0 for any free port")
+    parser.add_argument("--db", help="session history database for per-user highscores (default: in memory only)")
+    args = parser.parse_args()
+
+    store = SessionStore(args.db) if args.db else None
+    try:
+        asyncio.run(TypingServer(store).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+import unicodedata
+from array import array
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from segmentation import Segmentation
+
+BACKSPACE = "\b"
+
+CORRECTION = 0
+
+CORRECT = "correct"
+ERROR = "error"
+COMPLETE = "complete"
+
+
+class KeyEvent(NamedTuple):
+    """
+    A single timestamped keystroke.
+
+    :ivar timestamp: Time of the keystroke in seconds, on any monotonic clock.
+    :type timestamp: float
+    :ivar key: The typed character, or characters, e.g. committed by an input method at
+        once, or BACKSPACE to delete the last character.
+    :type key: str
+    """
+    timestamp: float
+    key: str
+
+
+class Metrics(NamedTuple):
+    """
+    Typing speed of a session in characters and words per second and per minute.
+    """
+    cps: float
+    cpm: float
+    wps: float
+    wpm: float
+
+
+ZERO_METRICS = Metrics(0.0, 0.0, 0.0, 0.0)
+
+
+def compute_metrics(chars: int, words: int, elapsed: float) -> Metrics:
+    """
+    Computes the typing speed for the given number of characters and words typed
+    over the given time.
+
+    :param chars: Number of characters typed so far.
+    :type chars: int
+    :param words: Number of words typed so far.
+    :type words: int
+    :param elapsed: Time spent typing, in seconds.
+    :type elapsed: float
+    :return: The typing speed, or all zeros if no time has elapsed yet.
+    :rtype: Metrics
+    """
+    if elapsed <= 0:
+        return ZERO_METRICS
+    chars_per_second = chars / elapsed
+    words_per_second = words / elapsed
+    return Metrics(chars_per_second, chars_per_second * 60, words_per_second, words_per_second * 60)
+
+
+class PrefixMatcher:
+    """
+    Tracks incrementally how much of the typed text matches the target.
+
+    Instead of comparing the whole typed text with the target after every
+    keystroke, the matcher keeps the typed length and the length of the
+    correctly typed prefix (which is also the position of the first error).
+    Typing or deleting a character then costs O(1), regardless of how long the
+    target is.
+
+    :ivar target: The text the user is asked to type.
+    :type target: str
+    :ivar typed: Number of characters typed so far.
+    :type typed: int
+    :ivar matched: Number of leading typed characters that match the target.
+    :type matched: int
+    """
+
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self.typed = 0
+        self.matched = 0
+
+    @property
+    def state(self) -> str:
+        """
+        CORRECT while the typed text is a prefix of the target, ERROR once it
+        diverges and COMPLETE when it equals the target.
+        """
+        if self.matched != self.typed:
+            return ERROR
+        if self.matched == len(self.target):
+            return COMPLETE
+        return CORRECT
+
+    def extend(self, text: str) -> None:
+        """
+        Appends typed characters.
+
+        :param text: The characters added to the end of the typed text.
+        :type text: str
+        :return: None
+        """
+        for char in text:
+            if self.matched == self.typed and self.matched < len(self.target) and self.target[self.matched] == char:
+                self.matched += 1
+            self.typed += 1
+
+    def truncate(self, length: int) -> None:
+        """
+        Deletes typed characters from the end, keeping the given number of them.
+
+        :param length: Number of typed characters to keep.
+        :type length: int
+        :return: None
+        """
+        self.typed = min(self.typed, length)
+        self.matched = min(self.matched, self.typed)
+
+
+class KeystrokeLog:
+    """
+    Compact, array-backed record of every keystroke of a session.
+
+    Each keystroke is stored as one entry in four parallel arrays: its time,
+    the position in the target it was typed at, the code point of the target
+    character expected there and the code point actually typed. Deleting a
+    character is stored as a correction, with CORRECTION (0) as both the
+    expected and the typed code point.
+
+    :ivar times: Time of every keystroke, in seconds.
+    :type times: array.array
+    :ivar positions: Position in the target of every keystroke.
+    :type positions: array.array
+    :ivar expected: Code point of the expected character, 0 past the end of the target.
+    :type expected: array.array
+    :ivar typed: Code point of the typed character, or CORRECTION.
+    :type typed: array.array
+    """
+
+    def __init__(self) -> None:
+        self.times = array("d")
+        self.positions = array("I")
+        self.expected = array("I")
+        self.typed = array("I")
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def add_chars(self, timestamp: float, position: int, text: str, target: str) -> None:
+        """
+        Records characters typed at the given position.
+
+        :param timestamp: Time of the keystroke, in seconds.
+        :type timestamp: float
+        :param position: Position in the target of the first typed character.
+        :type position: int
+        :param text: The typed characters; more than one when text was pasted.
+        :type text: str
+        :param target: The text the user is asked to type.
+        :type target: str
+        :return: None
+        """
+        for offset, char in enumerate(text, position):
+            self.times.append(timestamp)
+            self.positions.append(offset)
+            self.expected.append(ord(target[offset]) if offset < len(target) else 0)
+            self.typed.append(ord(char))
+
+    def add_corrections(self, timestamp: float, position: int, count: int) -> None:
+        """
+        Records deleted characters.
+
+        :param timestamp: Time of the keystroke, in seconds.
+        :type timestamp: float
+        :param position: Length of the typed text after the deletion.
+        :type position: int
+        :param count: Number of deleted characters.
+        :type count: int
+        :return: None
+        """
+        for offset in range(position + count - 1, position - 1, -1):
+            self.times.append(timestamp)
+            self.positions.append(offset)
+            self.expected.append(CORRECTION)
+            self.typed.append(CORRECTION)
+
+
+class TypingSession:
+    """
+    Headless scoring engine for a single typing test.
+
+    The session is fed keystrokes together with their timestamps and keeps track
+    of the typed text, whether it is still a correct prefix of the target and
+    when the target was completed, at a constant cost per keystroke (see
+    PrefixMatcher). It does not depend on Tkinter, so sessions
+    can be scored and profiled in bulk.
+
+    The clock starts with the first keystroke; metrics are measured from that
+    point to the requested time, or to the moment of completion once the
+    target has been typed.
+
+    The target is NFC-normalised and segmented into grapheme clusters and words
+    once, when the session is created. Characters are counted as grapheme
+    clusters, so a letter with combining marks, an Indic conjunct or an emoji
+    sequence counts once, and words by the target's word boundaries. For text
+    without spaceless scripts, the final count is the same as splitting the
+    typed text on single spaces, the formula the app has always used for its
+    scores; the live count during a test can differ from it while spaces are
+    typed in the wrong place.
+
+    :ivar target: The text the user is asked to type, NFC-normalised.
+    :type target: str
+    :ivar segmentation: Grapheme clusters and words of the target.
+    :type segmentation: Segmentation
+    :ivar started_at: Timestamp of the first keystroke, or None before the test starts.
+    :type started_at: float or None
+    :ivar finished_at: Timestamp at which the target was completed, or None.
+    :type finished_at: float or None
+    :ivar last_event_at: Timestamp of the most recent keystroke, or None.
+    :type last_event_at: float or None
+    :ivar keystrokes: Every keystroke applied to the session, with its timestamp.
+    :type keystrokes: KeystrokeLog
+    :ivar matcher: Tracks how much of the typed text matches the target.
+    :type matcher: PrefixMatcher
+    """
+
+    def __init__(self, target: str) -> None:
+        self.target = target if target.isascii() else unicodedata.normalize("NFC", target)
+        self.segmentation = Segmentation(self.target)
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.keystrokes = KeystrokeLog()
+        self.matcher = PrefixMatcher(self.target)
+        self._chars: list[str] = []
+        self._text: Optional[str] = ""
+
+    @property
+    def text(self) -> str:
+        """
+        The text typed so far.
+        """
+        if self._text is None:
+            self._text = "".join(self._chars)
+        return self._text
+
+    @property
+    def started(self) -> bool:
+        return self.started_at is not None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def is_correct(self) -> bool:
+        """
+        Whether the typed text is still a prefix of the target.
+        """
+        return self.matcher.matched == self.matcher.typed
+
+    @property
+    def state(self) -> str:
+        """
+        CORRECT, ERROR or COMPLETE, see PrefixMatcher.state. A mismatch confined to
+        the grapheme cluster being typed is still CORRECT while it is compatible
+        with the expected cluster, so characters being composed by an input method
+        (e.g. a Hangul syllable built up from its jamo) are not flagged as errors.
+        """
+        state = self.matcher.state
+        if state == ERROR and self._composing():
+            return CORRECT
+        return state
+
+    def start(self, timestamp: float) -> None:
+        """
+        Starts the clock, unless it is already running.
+
+        :param timestamp: Time at which the test starts, in seconds.
+        :type timestamp: float
+        :return: None
+        """
+        if self.started_at is None:
+            self.started_at = timestamp
+
+    def feed(self, event: KeyEvent) -> bool:
+        """
+        Applies a single keystroke to the session. The first keystroke that types
+        something starts the clock; a backspace before it, and keystrokes after
+        completion, are ignored. A keystroke that types several characters is
+        applied one character at a time.
+
+        :param event: The keystroke to apply.
+        :type event: KeyEvent
+        :raises ValueError: If the keystroke types no character.
+        :return: True if this keystroke completed the target.
+        :rtype: bool
+        """
+        if len(event.key) != 1:
+            if not event.key:
+                raise ValueError("a keystroke must type at least one character")
+            completed = False
+            for char in event.key:
+                completed = self.feed(KeyEvent(event.timestamp, char))
+                if completed:
+                    break
+            return completed
+        if self.finished_at is not None or (event.key == BACKSPACE and self.started_at is None):
+            return False
+        self.start(event.timestamp)
+        self.last_event_at = event.timestamp
+        if event.key == BACKSPACE:
+            if self._chars:
+                self._chars.pop()
+                self.matcher.truncate(len(self._chars))
+                self.keystrokes.add_corrections(event.timestamp, len(self._chars), 1)
+        else:
+            self.keystrokes.add_chars(event.timestamp, len(self._chars), event.key, self.target)
+            self._chars.append(event.key)
+            self.matcher.extend(event.key)
+        self._text = None
+        return self._check_completion(event.timestamp)
+
+    def feed_all(self, events: Iterable[KeyEvent]) -> None:
+        """
+        Applies a sequence of keystrokes to the session.
+
+        :param events: The keystrokes to apply, in chronological order.
+        :type events: Iterable[KeyEvent]
+        :return: None
+        """
+        for event in events:
+            self.feed(event)
+
+    def elapsed(self, now: float) -> float:
+        """
+        Returns the time spent typing, in seconds.
+
+        :param now: The current time, used while the test is still running.
+        :type now: float
+        :return: Seconds between the first keystroke and completion (or now).
+        :rtype: float
+        """
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else now
+        return end - self.started_at
+
+    def metrics(self, now: float) -> Metrics:
+        """
+        Returns the typing speed of the session.
+
+        :param now: The current time, used while the test is still running.
+        :type now: float
+        :return: The typing speed measured up to completion (or now).
+        :rtype: Metrics
+        """
+        matcher = self.matcher
+        chars = self.segmentation.graphemes(matcher.matched) + matcher.typed - matcher.matched
+        return compute_metrics(chars, self.segmentation.words(matcher.typed), self.elapsed(now))
+
+    def _composing(self) -> bool:
+        if self.segmentation.ends is None:
+            return False
+        start, end = self.segmentation.cluster(self.matcher.matched)
+        typed = self.matcher.typed
+        if typed > end:
+            return False
+        pending = "".join(self._chars[start:typed])
+        return unicodedata.normalize("NFKD", self.target[start:end]).startswith(unicodedata.normalize("NFKD", pending))
+
+    def _check_completion(self, timestamp: float) -> bool:
+        if self.matcher.matched == self.matcher.typed == len(self.target):
+            self.finished_at = timestamp
+            return True
+        return False
+
+
+def replay(target: str, events: Iterable[KeyEvent]) -> tuple[Metrics, bool]:
+    """
+    Scores a recorded session from its keystrokes.
+
+    :param target: The text the user was asked to type.
+    :type target: str
+    :param events: The recorded keystrokes, in chronological order.
+    :type events: Iterable[KeyEvent]
+    :return: The final metrics and whether the target was completed.
+    :rtype: tuple[Metrics, bool]
+    """
+    session = TypingSession(target)
+    session.feed_all(events)
+    end = session.last_event_at if session.last_event_at is not None else 0.0
+    return session.metrics(end), session.finished
+
+
+def replay_many(sessions: Iterable[tuple[str, Iterable[KeyEvent]]]) -> Iterator[tuple[Metrics, bool]]:
+    """
+    Scores recorded sessions in bulk.
+
+    :param sessions: Pairs of target text and recorded keystrokes.
+    :type sessions: Iterable[tuple[str, Iterable[KeyEvent]]]
+    :return: The metrics and completion flag of every session, in input order.
+    :rtype: Iterator[tuple[Metrics, bool]]
+    """
+    for target, events in sessions:
+        yield replay(target, events)
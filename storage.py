@@ -0,0 +1,376 @@
+import csv
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from ghost import Ghost
+from session import Metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT 'app',
+    chars INTEGER,
+    elapsed REAL,
+    cps REAL NOT NULL,
+    cpm REAL NOT NULL,
+    wps REAL NOT NULL,
+    wpm REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_cps ON sessions (cps);
+CREATE INDEX IF NOT EXISTS sessions_wps ON sessions (wps);
+CREATE TABLE IF NOT EXISTS bigrams (
+    bigram TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    imported_at REAL NOT NULL
+);
+"""
+
+USERS = """
+ALTER TABLE sessions ADD COLUMN user TEXT NOT NULL DEFAULT '';
+DROP INDEX IF EXISTS sessions_cps;
+DROP INDEX IF EXISTS sessions_wps;
+CREATE INDEX sessions_user_cps ON sessions (user, cps);
+CREATE INDEX sessions_user_wps ON sessions (user, wps);
+"""
+
+GHOSTS = """
+CREATE TABLE ghosts (
+    prompt TEXT PRIMARY KEY,
+    wpm REAL NOT NULL,
+    timeline BLOB NOT NULL
+);
+"""
+
+# Schema scripts by the version they upgrade the database to, applied in order.
+# Statements are separated by semicolons, which must not appear anywhere else.
+MIGRATIONS = [(2, SCHEMA), (3, USERS), (4, GHOSTS)]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Most records the writer thread commits in one transaction.
+BATCH_SIZE = 500
+# Seconds to wait before retrying a batch that failed to write, e.g. because the
+# database was locked by another process.
+RETRY_DELAYS = (0.1, 0.5, 2.0)
+
+
+class SessionRecord(NamedTuple):
+    """
+    A completed typing test as stored in the session history.
+
+    :ivar finished_at: Wall-clock time at which the test was completed, as a Unix timestamp.
+    :type finished_at: float
+    :ivar chars: Length of the typed text, or None if unknown.
+    :type chars: int or None
+    :ivar elapsed: Time spent typing in seconds, or None if unknown.
+    :type elapsed: float or None
+    :ivar metrics: Typing speed achieved in the test.
+    :type metrics: Metrics
+    :ivar source: Where the record comes from, e.g. "app" or "csv" for imported highscores.
+    :type source: str
+    :ivar bigrams: Per-bigram statistics of the test to add to the running totals, as
+        (correctly typed count, total latency in milliseconds, errors) per bigram.
+    :type bigrams: dict[str, tuple[int, float, int]] or None
+    :ivar user: Name of the user who took the test; the desktop app uses "".
+    :type user: str
+    :ivar ghost: Timeline of the test, kept if it is the fastest run on its kind of prompt.
+    :type ghost: Ghost or None
+    """
+    finished_at: float
+    chars: Optional[int]
+    elapsed: Optional[float]
+    metrics: Metrics
+    source: str = "app"
+    bigrams: Optional[dict[str, tuple[int, float, int]]] = None
+    user: str = ""
+    ghost: Optional[Ghost] = None
+
+
+def connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Opens the session history database in WAL mode and creates or upgrades its schema
+    if needed. Every migration runs in its own transaction together with the bump of
+    the schema version, so a crash leaves the database either before or after the
+    step, never half-migrated; the version is re-read once the write lock is held,
+    so connections opened concurrently do not apply a step twice.
+
+    :param path: Path to the SQLite database file.
+    :type path: str
+    :param check_same_thread: Whether only the opening thread may use the connection.
+    :type check_same_thread: bool
+    :return: An open connection.
+    :rtype: sqlite3.Connection
+    """
+    connection = sqlite3.connect(path, check_same_thread=check_same_thread)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    for target, script in MIGRATIONS:
+        if connection.execute("PRAGMA user_version").fetchone()[0] >= target:
+            continue
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("PRAGMA user_version").fetchone()[0] < target:
+                for statement in script.split(";"):
+                    if statement.strip():
+                        connection.execute(statement)
+                connection.execute(f"PRAGMA user_version={target}")
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+    return connection
+
+
+def insert_records(connection: sqlite3.Connection, records: list[SessionRecord]) -> None:
+    """
+    Appends records to the session history, adds their bigram statistics to the
+    running totals and keeps their ghosts where they beat the stored one, in a
+    single transaction.
+
+    :param connection: An open session history connection.
+    :type connection: sqlite3.Connection
+    :param records: The records to append.
+    :type records: list[SessionRecord]
+    :return: None
+    """
+    with connection:
+        connection.executemany(
+            "INSERT INTO sessions (user, finished_at, source, chars, elapsed, cps, cpm, wps, wpm) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(record.user, record.finished_at, record.source, record.chars, record.elapsed, *record.metrics)
+             for record in records])
+        connection.executemany(
+            "INSERT INTO bigrams (bigram, count, total_ms, errors) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (bigram) DO UPDATE SET count = count + excluded.count, "
+            "total_ms = total_ms + excluded.total_ms, errors = errors + excluded.errors",
+            [(bigram, *stats) for record in records if record.bigrams for bigram, stats in record.bigrams.items()])
+        connection.executemany(
+            "INSERT INTO ghosts (prompt, wpm, timeline) VALUES (?, ?, ?) "
+            "ON CONFLICT (prompt) DO UPDATE SET wpm = excluded.wpm, timeline = excluded.timeline "
+            "WHERE excluded.wpm > ghosts.wpm",
+            [(record.ghost.prompt, record.ghost.wpm, record.ghost.to_bytes()) for record in records if record.ghost])
+
+
+class SessionStore:
+    """
+    Persistent history of every completed typing test, stored in SQLite.
+
+    Every completed test is appended as a row; highscores are answered by indexed
+    queries instead of rewriting a file. Inserts are handed to a background
+    writer thread through a queue, so recording a result never blocks the Tk
+    main thread on disk I/O. Reads use a separate connection, which WAL mode
+    allows to run alongside the writer; it may be used from a thread other than
+    the one that opened the store, e.g. to keep queries off an event loop, as long
+    as only one thread reads at a time.
+
+    The writer drains everything queued since its last write, up to BATCH_SIZE
+    records, and commits it as one transaction with synchronous=FULL, so a burst
+    of results costs one fsync and every committed batch survives a crash or
+    power loss; a crash in the middle of a batch rolls it back as a whole and never
+    leaves a partly written database. Batches that SQLite fails to write are
+    retried after each of RETRY_DELAYS and only then reported on stderr and
+    counted as failed; any other error fails the batch at once. The writer opens
+    its connection with the first batch and, if that fails, tries again with the
+    next one. Either way it keeps running, so flush() and close() never wait on a
+    dead thread.
+
+    :ivar path: Path to the SQLite database file.
+    :type path: str
+    :ivar written: Number of records written so far.
+    :type written: int
+    :ivar batches: Number of transactions the records were written in.
+    :type batches: int
+    :ivar failed: Number of records that could not be written.
+    :type failed: int
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens (and if needed creates) the session history and starts the writer thread.
+
+        :param path: Path to the SQLite database file.
+        :type path: str
+        """
+        self.path = path
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self._connection = connect(path, check_same_thread=False)
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="SessionStore writer", daemon=True)
+        self._writer.start()
+
+    def record(self, record: SessionRecord) -> None:
+        """
+        Queues a completed test for writing and returns immediately.
+
+        :param record: The completed test.
+        :type record: SessionRecord
+        :return: None
+        """
+        self._queue.put(record)
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: The number of queued records not written yet.
+        :rtype: int
+        """
+        # Once closed, the queue also holds the writer's stop sentinel.
+        return max(0, self._queue.unfinished_tasks - self._closed)
+
+    def flush(self) -> None:
+        """
+        Blocks until every queued record has been written.
+
+        :return: None
+        """
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Writes any queued records, stops the writer thread and closes the database.
+
+        :param timeout: Maximum time to wait for the queued records to be written, in
+            seconds, or None to wait until they are.
+        :type timeout: float or None
+        :return: True if every queued record was written in time; otherwise the writer
+            is left to finish in the background until the process exits.
+        :rtype: bool
+        """
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._connection.close()
+        return not self._writer.is_alive()
+
+    def count(self) -> int:
+        """
+        :return: The number of stored sessions.
+        :rtype: int
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def highscores(self, user: str = "") -> Metrics:
+        """
+        Returns the best scores of a user in the history. As in the app's highscore display,
+        the CPM belongs to the session with the best CPS and the WPM to the one with the best WPS.
+
+        :param user: Name of the user; the desktop app uses "".
+        :type user: str
+        :return: The highscores, or all zeros for a user without stored sessions.
+        :rtype: Metrics
+        """
+        chars = self._connection.execute("SELECT cps, cpm FROM sessions WHERE user = ? ORDER BY cps DESC LIMIT 1",
+                                         (user,)).fetchone()
+        words = self._connection.execute("SELECT wps, wpm FROM sessions WHERE user = ? ORDER BY wps DESC LIMIT 1",
+                                         (user,)).fetchone()
+        return Metrics(*(chars or (0.0, 0.0)), *(words or (0.0, 0.0)))
+
+    def bigram_stats(self) -> dict[str, tuple[int, float, int]]:
+        """
+        Returns the running per-bigram totals over all stored sessions.
+
+        :return: (correctly typed count, total latency in milliseconds, errors) per bigram.
+        :rtype: dict[str, tuple[int, float, int]]
+        """
+        return {bigram: (count, total_ms, errors) for bigram, count, total_ms, errors
+                in self._connection.execute("SELECT bigram, count, total_ms, errors FROM bigrams")}
+
+    def ghosts(self) -> dict[str, Ghost]:
+        """
+        :return: The ghost of the fastest run on every kind of prompt, by prompt key.
+        :rtype: dict[str, Ghost]
+        """
+        return {prompt: Ghost.from_bytes(prompt, wpm, timeline) for prompt, wpm, timeline
+                in self._connection.execute("SELECT prompt, wpm, timeline FROM ghosts")}
+
+    def import_scores_csv(self, csv_path: str) -> bool:
+        """
+        Imports the highscores kept in the single-row "scores.csv" file used by earlier
+        versions of the app. Every file is only imported once.
+
+        :param csv_path: Path to the scores.csv file.
+        :type csv_path: str
+        :return: True if the file was imported, False if it does not exist or was imported before.
+        :rtype: bool
+        """
+        key = os.path.abspath(csv_path)
+        if not os.path.exists(csv_path):
+            return False
+        if self._connection.execute("SELECT 1 FROM imports WHERE path = ?", (key,)).fetchone():
+            return False
+        with open(csv_path, mode="r", newline="", encoding="utf-8") as file:
+            rows = list(csv.DictReader(file))
+        records = [SessionRecord(os.path.getmtime(csv_path), None, None,
+                                 Metrics(float(row["HIGHSCORE_CPS"]), float(row["HIGHSCORE_CPM"]),
+                                         float(row["HIGHSCORE_WPS"]), float(row["HIGHSCORE_WPM"])),
+                                 source="csv")
+                   for row in rows[:1]]
+        insert_records(self._connection, records)
+        with self._connection:
+            self._connection.execute("INSERT INTO imports (path, imported_at) VALUES (?, ?)", (key, time.time()))
+        return True
+
+    def _write_loop(self) -> None:
+        connection = None
+        try:
+            closing = False
+            while not closing:
+                batch = []
+                record = self._queue.get()
+                while True:
+                    if record is None:
+                        closing = True
+                    else:
+                        batch.append(record)
+                    if closing or len(batch) >= BATCH_SIZE or self._queue.empty():
+                        break
+                    record = self._queue.get_nowait()
+                try:
+                    if batch:
+                        connection = self._write_batch(connection, batch)
+                finally:
+                    for _ in range(len(batch) + closing):
+                        self._queue.task_done()
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _open_writer(self) -> sqlite3.Connection:
+        connection = connect(self.path)
+        try:
+            connection.execute("PRAGMA synchronous=FULL")
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    def _write_batch(self, connection: Optional[sqlite3.Connection],
+                     batch: list[SessionRecord]) -> Optional[sqlite3.Connection]:
+        for delay in (*RETRY_DELAYS, None):
+            try:
+                if connection is None:
+                    connection = self._open_writer()
+                insert_records(connection, batch)
+            except Exception as error:
+                if delay is None or not isinstance(error, sqlite3.Error):
+                    self.failed += len(batch)
+                    print(f"Could not save {len(batch)} test results to {self.path}: {error}", file=sys.stderr)
+                    return connection
+                time.sleep(delay)
+            else:
+                self.written += len(batch)
+                self.batches += 1
+                return connection
@@ -0,0 +1,134 @@
+import time
+import tkinter as tk
+from array import array
+from typing import Callable, Optional
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MS = 1_000_000
+
+
+def now() -> float:
+    """
+    Returns the current time of the monotonic high-resolution clock in seconds.
+
+    :return: Seconds from time.perf_counter_ns(), as a float.
+    :rtype: float
+    """
+    return time.perf_counter_ns() / NS_PER_SECOND
+
+
+def percentile(samples: array, fraction: float) -> int:
+    """
+    Returns the sample below which the given fraction of samples fall.
+
+    :param samples: The recorded samples.
+    :type samples: array.array
+    :param fraction: A value between 0 and 1, e.g. 0.99 for the 99th percentile.
+    :type fraction: float
+    :return: The percentile, or 0 if there are no samples.
+    :rtype: int
+    """
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class TickStats:
+    """
+    Collects per-tick instrumentation of a Ticker.
+
+    :ivar jitter_ns: How late every tick fired relative to its deadline, in nanoseconds.
+    :type jitter_ns: array.array
+    :ivar cost_ns: How long every tick callback took to run, in nanoseconds.
+    :type cost_ns: array.array
+    """
+
+    def __init__(self) -> None:
+        self.jitter_ns = array("q")
+        self.cost_ns = array("q")
+
+    def record(self, jitter_ns: int, cost_ns: int) -> None:
+        self.jitter_ns.append(jitter_ns)
+        self.cost_ns.append(cost_ns)
+
+    def summary(self) -> dict[str, float]:
+        """
+        Summarises the recorded ticks.
+
+        :return: Tick count plus mean, p99 and max of the jitter and the update
+            cost, in milliseconds.
+        :rtype: dict[str, float]
+        """
+        result = {"ticks": len(self.cost_ns)}
+        for name, samples in (("jitter", self.jitter_ns), ("cost", self.cost_ns)):
+            result[f"{name}_mean_ms"] = sum(samples) / len(samples) / NS_PER_MS if samples else 0.0
+            result[f"{name}_p99_ms"] = percentile(samples, 0.99) / NS_PER_MS
+            result[f"{name}_max_ms"] = max(samples, default=0) / NS_PER_MS
+        return result
+
+
+class Ticker:
+    """
+    Calls a function at a fixed refresh rate using Tk's after() on the main thread.
+
+    Deadlines are computed from time.perf_counter_ns() rather than by adding up
+    intervals, so late ticks do not make the schedule drift: each delay is the
+    time left until the next deadline, and deadlines that were missed entirely
+    are skipped instead of being fired in a burst. Every tick records how late
+    it fired and how long the callback took in `stats`.
+
+    :ivar widget: Any widget of the Tk application, used to schedule callbacks.
+    :type widget: tk.Misc
+    :ivar callback: Function called on every tick with the current time in nanoseconds.
+    :type callback: Callable[[int], None]
+    :ivar interval_ms: Refresh interval in milliseconds.
+    :type interval_ms: int
+    :ivar stats: Jitter and cost of every tick since the ticker was created.
+    :type stats: TickStats
+    """
+
+    def __init__(self, widget: tk.Misc, callback: Callable[[int], None], interval_ms: int = 100) -> None:
+        self.widget = widget
+        self.callback = callback
+        self.interval_ms = interval_ms
+        self.stats = TickStats()
+        self._deadline = 0
+        self._after_id: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._after_id is not None
+
+    def start(self) -> None:
+        """
+        Starts ticking, with the first tick one interval from now.
+
+        :return: None
+        """
+        self.stop()
+        self._deadline = time.perf_counter_ns() + self.interval_ms * NS_PER_MS
+        self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def stop(self) -> None:
+        """
+        Cancels the pending tick, if any.
+
+        :return: None
+        """
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self) -> None:
+        fired = time.perf_counter_ns()
+        self.callback(fired)
+        finished = time.perf_counter_ns()
+        self.stats.record(fired - self._deadline, finished - fired)
+        if self._after_id is None:
+            return
+        interval = self.interval_ms * NS_PER_MS
+        self._deadline += interval
+        if self._deadline <= finished:
+            self._deadline += ((finished - self._deadline) // interval + 1) * interval
+        self._after_id = self.widget.after(-(-(self._deadline - finished) // NS_PER_MS), self._tick)
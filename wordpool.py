@@ -0,0 +1,369 @@
+import bisect
+import glob
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import unicodedata
+import zlib
+from array import array
+from typing import Iterable, Optional
+
+POOL_MAGIC = b"WORDPOOL"
+POOL_VERSION = 1
+HEADER = struct.Struct("<8sIIII")
+
+MAX_LENGTH = 16
+DIFFICULTY_LEVELS = 4
+
+HOME_ROW = "asdfghjkl"
+TOP_ROW = "qwertyuiop"
+BOTTOM_ROW = "zxcvbnm"
+KEY_COSTS = {**{char: 0 for char in HOME_ROW}, **{char: 1 for char in TOP_ROW}, **{char: 2 for char in BOTTOM_ROW}}
+OTHER_KEY_COST = 3
+
+
+def normalise_word(word: str) -> Optional[str]:
+    """
+    :param word: A word as read from a corpus, possibly with surrounding whitespace.
+    :type word: str
+    :return: The word NFC-normalised and lower-cased, or None if it is empty or
+        contains whitespace or unprintable characters.
+    :rtype: str or None
+    """
+    word = unicodedata.normalize("NFC", word.strip()).lower()
+    if not word or not word.isprintable() or any(char.isspace() for char in word):
+        return None
+    return word
+
+
+def difficulty(word: str) -> float:
+    """
+    Scores how hard a word is to type on a QWERTY keyboard, by the mean distance of
+    its keys from the home row: 0 for home row keys, 1 for the top row, 2 for the
+    bottom row and 3 for anything else (digits, punctuation, non-ASCII letters).
+
+    :param word: A normalised word.
+    :type word: str
+    :return: A score from 0 (home row only) to 1.
+    :rtype: float
+    """
+    return sum(KEY_COSTS.get(char, OTHER_KEY_COST) for char in word) / (len(word) * OTHER_KEY_COST)
+
+
+def difficulty_level(word: str) -> int:
+    """
+    :param word: A normalised word.
+    :type word: str
+    :return: The difficulty bucket of the word, from 0 (home row heavy) to DIFFICULTY_LEVELS - 1.
+    :rtype: int
+    """
+    return min(DIFFICULTY_LEVELS - 1, int(difficulty(word) * DIFFICULTY_LEVELS))
+
+
+def bucket_of(word: str) -> int:
+    return (min(len(word), MAX_LENGTH) - 1) * DIFFICULTY_LEVELS + difficulty_level(word)
+
+
+def shard_paths(path: str, shards: int) -> list[str]:
+    """
+    :param path: Path of the pool, e.g. "assets/words.pool".
+    :type path: str
+    :param shards: Number of shards.
+    :type shards: int
+    :return: The path itself for a single shard, otherwise "assets/words-0.pool" and so on.
+    :rtype: list[str]
+    """
+    if shards == 1:
+        return [path]
+    stem, extension = os.path.splitext(path)
+    return [f"{stem}-{shard}{extension}" for shard in range(shards)]
+
+
+def find_shards(path: str) -> list[str]:
+    """
+    Finds the files of a compiled pool. Only the names shard_paths() writes are
+    matched, so e.g. "assets/words-hi.pool" is not taken for a shard of
+    "assets/words.pool".
+
+    :param path: Path of the pool, e.g. "assets/words.pool".
+    :type path: str
+    :return: The path itself if it exists, followed by its existing numbered shards in
+        shard order.
+    :rtype: list[str]
+    """
+    stem, extension = os.path.splitext(path)
+    shard_name = re.compile(re.escape(os.path.basename(stem)) + r"-(\d+)" + re.escape(extension))
+    shards = []
+    for candidate in glob.glob(f"{glob.escape(stem)}-*{extension}"):
+        match = shard_name.fullmatch(os.path.basename(candidate))
+        if match:
+            shards.append((int(match.group(1)), candidate))
+    return ([path] if os.path.exists(path) else []) + [candidate for _, candidate in sorted(shards)]
+
+
+def build_pool(sources: Iterable[str], path: str, shards: int = 1) -> list[str]:
+    """
+    Compiles word lists into the binary word pool format read by WordPool.
+
+    Every source is read line by line; words are normalised and deduplicated across
+    all sources, then sorted into buckets by length (1 to MAX_LENGTH letters, longer
+    words sharing the last bucket) and difficulty level. Each shard file contains:
+
+    - a header: POOL_MAGIC, POOL_VERSION, the word count, MAX_LENGTH and DIFFICULTY_LEVELS,
+    - the index of the first word of every bucket, plus the word count (uint32 each),
+    - the byte offset of every word in the text, plus the text length (uint32 each),
+    - the UTF-8 text of all words, concatenated in bucket order.
+
+    All integers are little-endian. With several shards, words are assigned to a
+    shard by a hash of the word, so every shard has the same bucket layout and a
+    similar share of every bucket.
+
+    :param sources: Paths to word lists, one word per line.
+    :type sources: Iterable[str]
+    :param path: Path of the pool to write.
+    :type path: str
+    :param shards: Number of shard files to split the pool into.
+    :type shards: int
+    :return: The paths of the written shard files.
+    :rtype: list[str]
+    """
+    words: dict[str, None] = {}
+    for source in sources:
+        with open(source, mode="r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                word = normalise_word(line)
+                if word is not None:
+                    words[word] = None
+    shard_words: list[list[list[str]]] = [[[] for _ in range(MAX_LENGTH * DIFFICULTY_LEVELS)] for _ in range(shards)]
+    for word in words:
+        encoded = word.encode("utf-8")
+        shard_words[zlib.crc32(encoded) % shards][bucket_of(word)].append(word)
+
+    paths = shard_paths(path, shards)
+    for shard_path, buckets in zip(paths, shard_words):
+        bucket_starts = array("I", [0])
+        offsets = array("I", [0])
+        text = bytearray()
+        for bucket in buckets:
+            for word in sorted(bucket):
+                text += word.encode("utf-8")
+                offsets.append(len(text))
+            bucket_starts.append(len(offsets) - 1)
+        if sys.byteorder == "big":
+            bucket_starts.byteswap()
+            offsets.byteswap()
+        temporary = shard_path + ".tmp"
+        with open(temporary, mode="wb") as file:
+            file.write(HEADER.pack(POOL_MAGIC, POOL_VERSION, len(offsets) - 1, MAX_LENGTH, DIFFICULTY_LEVELS))
+            file.write(bucket_starts.tobytes())
+            file.write(offsets.tobytes())
+            file.write(text)
+        os.replace(temporary, shard_path)
+    return paths
+
+
+class PoolShard:
+    """
+    One memory-mapped word pool file. The bucket table and the word offsets are
+    used in place from the mapping, so opening a shard costs the same for any
+    number of words.
+
+    :ivar path: Path to the pool file.
+    :type path: str
+    :ivar count: Number of words in the shard.
+    :type count: int
+    :ivar bucket_starts: Index of the first word of every bucket, followed by `count`.
+    :type bucket_starts: memoryview or array.array
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: Path to the pool file.
+        :type path: str
+        :raises ValueError: If the file is not a word pool of a supported layout.
+        """
+        self.path = path
+        with open(path, mode="rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, max_length, levels = HEADER.unpack_from(self._mmap)
+        if magic != POOL_MAGIC or version != POOL_VERSION or (max_length, levels) != (MAX_LENGTH, DIFFICULTY_LEVELS):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {POOL_VERSION} word pool; rebuild it with wordpool.py")
+        buckets = MAX_LENGTH * DIFFICULTY_LEVELS + 1
+        offsets_at = HEADER.size + 4 * buckets
+        self._text_at = offsets_at + 4 * (self.count + 1)
+        self.bucket_starts = self._integers(HEADER.size, buckets)
+        self._offsets = self._integers(offsets_at, self.count + 1)
+
+    def word(self, index: int) -> str:
+        return self._mmap[self._text_at + self._offsets[index]:self._text_at + self._offsets[index + 1]].decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self.bucket_starts, memoryview):
+            self.bucket_starts.release()
+            self._offsets.release()
+        self._mmap.close()
+
+    def _integers(self, offset: int, count: int):
+        view = memoryview(self._mmap)[offset:offset + 4 * count]
+        if sys.byteorder == "little":
+            return view.cast("I")
+        values = array("I")
+        values.frombytes(view)
+        view.release()
+        values.byteswap()
+        return values
+
+
+class WordPool:
+    """
+    Compiled, memory-mapped word pool built by build_pool(), possibly split into
+    several shard files.
+
+    Words are stored sorted by (length, difficulty level) bucket, so the words
+    matching a length range and a maximum difficulty form a few contiguous index
+    ranges per shard. A sample draws k distinct positions over those ranges and
+    decodes only the chosen words, which costs O(k) plus the number of buckets,
+    independently of the pool size; nothing is parsed when the pool is opened.
+
+    :ivar paths: Paths to the shard files.
+    :type paths: list[str]
+    """
+
+    def __init__(self, paths: list[str]) -> None:
+        """
+        Creates a pool from the given shard files. Nothing is read until the first sample.
+
+        :param paths: Paths to the shard files.
+        :type paths: list[str]
+        """
+        self.paths = paths
+        self._shards: Optional[list[PoolShard]] = None
+
+    def __len__(self) -> int:
+        return sum(shard.count for shard in self.shards())
+
+    def shards(self) -> list[PoolShard]:
+        """
+        :raises FileNotFoundError: If a shard file does not exist.
+        :return: The opened shard files.
+        :rtype: list[PoolShard]
+        """
+        if self._shards is None:
+            self._shards = [PoolShard(path) for path in self.paths]
+        return self._shards
+
+    def bucket_size(self, length: int, level: int) -> int:
+        """
+        :param length: Number of letters; MAX_LENGTH includes all longer words.
+        :type length: int
+        :param level: Difficulty level.
+        :type level: int
+        :return: Number of words in the bucket, over all shards.
+        :rtype: int
+        """
+        bucket = (length - 1) * DIFFICULTY_LEVELS + level
+        return sum(shard.bucket_starts[bucket + 1] - shard.bucket_starts[bucket] for shard in self.shards())
+
+    def ranges(self, min_length: int = 1, max_length: int = MAX_LENGTH,
+               max_level: int = DIFFICULTY_LEVELS - 1) -> list[tuple[PoolShard, int, int]]:
+        """
+        :param min_length: Minimum number of letters.
+        :type min_length: int
+        :param max_length: Maximum number of letters; MAX_LENGTH includes all longer words.
+        :type max_length: int
+        :param max_level: Maximum difficulty level, 0 for home row heavy words only.
+        :type max_level: int
+        :return: The (shard, first index, end index) ranges of the matching words.
+        :rtype: list[tuple[PoolShard, int, int]]
+        """
+        result = []
+        for shard in self.shards():
+            for length in range(max(min_length, 1), min(max_length, MAX_LENGTH) + 1):
+                bucket = (length - 1) * DIFFICULTY_LEVELS
+                start = shard.bucket_starts[bucket]
+                end = shard.bucket_starts[bucket + min(max_level, DIFFICULTY_LEVELS - 1) + 1]
+                if start < end:
+                    result.append((shard, start, end))
+        return result
+
+    def count(self, min_length: int = 1, max_length: int = MAX_LENGTH,
+              max_level: int = DIFFICULTY_LEVELS - 1) -> int:
+        """
+        :param min_length: Minimum number of letters.
+        :type min_length: int
+        :param max_length: Maximum number of letters; MAX_LENGTH includes all longer words.
+        :type max_length: int
+        :param max_level: Maximum difficulty level, 0 for home row heavy words only.
+        :type max_level: int
+        :return: The number of words matching the filters, over all shards.
+        :rtype: int
+        """
+        return sum(end - start for _, start, end in self.ranges(min_length, max_length, max_level))
+
+    def sample(self, k: int, min_length: int = 1, max_length: int = MAX_LENGTH,
+               max_level: int = DIFFICULTY_LEVELS - 1) -> list[str]:
+        """
+        Returns k distinct words drawn uniformly from the words matching the filters.
+
+        :param k: Number of words to draw.
+        :type k: int
+        :param min_length: Minimum number of letters.
+        :type min_length: int
+        :param max_length: Maximum number of letters; MAX_LENGTH includes all longer words.
+        :type max_length: int
+        :param max_level: Maximum difficulty level, 0 for home row heavy words only.
+        :type max_level: int
+        :raises ValueError: If fewer than k words match the filters.
+        :return: A list of k words.
+        :rtype: list[str]
+        """
+        ranges = self.ranges(min_length, max_length, max_level)
+        ends = []
+        total = 0
+        for _, start, end in ranges:
+            total += end - start
+            ends.append(total)
+        if total < k:
+            raise ValueError(f"only {total} words match the filters, {k} requested")
+        words = []
+        for position in random.sample(range(total), k):
+            index = bisect.bisect_right(ends, position)
+            shard, _, end = ranges[index]
+            words.append(shard.word(end - (ends[index] - position)))
+        return words
+
+    def close(self) -> None:
+        """
+        Releases the memory mappings. The pool is re-opened on the next access.
+
+        :return: None
+        """
+        for shard in self._shards or ():
+            shard.close()
+        self._shards = None
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compiles word lists into a memory-mappable word pool.")
+    parser.add_argument("sources", nargs="+", help="word lists, one word per line")
+    parser.add_argument("-o", "--output", default="assets/words.pool", help="path of the pool to write")
+    parser.add_argument("--shards", type=int, default=1, help="number of shard files")
+    args = parser.parse_args()
+
+    paths = build_pool(args.sources, args.output, args.shards)
+    pool = WordPool(paths)
+    print(f"{len(pool)} words written to {', '.join(paths)}")
+    for level in range(DIFFICULTY_LEVELS):
+        print(f"difficulty {level}: " + " ".join(f"{pool.bucket_size(length, level):>5}"
+                                                for length in range(1, MAX_LENGTH + 1)))
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import unicodedata
+from typing import Optional
+
+from adaptive import AdaptiveSampler
+from corpus import WordCorpus
+from wordpool import DIFFICULTY_LEVELS, MAX_LENGTH, WordPool, find_shards
+
+WORDS_PATH = "./assets/words.txt"
+POOL_PATH = "./assets/words.pool"
+WORD_CORPUS = WordCorpus(WORDS_PATH)
+WORD_POOL = WordPool(find_shards(POOL_PATH))
+ADAPTIVE_SAMPLER = AdaptiveSampler(WORD_CORPUS)
+
+ENGLISH = "English"
+# Word lists of the selectable languages, all UTF-8 encoded with one word per line.
+LANGUAGES = {
+    ENGLISH: WORDS_PATH,
+    "हिन्दी (Hindi)": "./assets/words-hi.txt",
+    "日本語 (Japanese)": "./assets/words-ja.txt",
+}
+LANGUAGE_CORPORA = {ENGLISH: WORD_CORPUS}
+
+
+def available_languages() -> list[str]:
+    """
+    :return: The languages whose word list exists, ENGLISH always included.
+    :rtype: list[str]
+    """
+    return [language for language, path in LANGUAGES.items() if language == ENGLISH or os.path.exists(path)]
+
+
+def language_corpus(language: str) -> WordCorpus:
+    """
+    :param language: One of the keys of LANGUAGES.
+    :type language: str
+    :return: The word corpus of the language, indexed on first use.
+    :rtype: WordCorpus
+    """
+    corpus = LANGUAGE_CORPORA.get(language)
+    if corpus is None:
+        corpus = LANGUAGE_CORPORA[language] = WordCorpus(LANGUAGES[language])
+    return corpus
+
+
+def pool_is_current() -> bool:
+    """
+    :return: True if a compiled word pool exists and is not older than "words.txt".
+    :rtype: bool
+    """
+    if not WORD_POOL.paths:
+        return False
+    try:
+        words_mtime = os.stat(WORDS_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return True
+    return all(os.stat(path).st_mtime_ns >= words_mtime for path in WORD_POOL.paths)
+
+
+def filters_match(lengths: Optional[tuple[int, int]] = None, max_level: Optional[int] = None, k=10) -> bool:
+    """
+    :param lengths: Minimum and maximum number of letters of the words, or None for any length.
+    :type lengths: tuple[int, int] or None
+    :param max_level: Maximum difficulty level of the words, or None for any difficulty.
+    :type max_level: int or None
+    :param k: Number of words a test needs.
+    :type k: int
+    :return: True if the compiled word pool holds at least k words matching the filters.
+    :rtype: bool
+    """
+    min_length, max_length = lengths or (1, MAX_LENGTH)
+    return WORD_POOL.count(min_length, max_length, DIFFICULTY_LEVELS - 1 if max_level is None else max_level) >= k
+
+
+def word_picker(k=10, adaptive=False, lengths: Optional[tuple[int, int]] = None,
+                max_level: Optional[int] = None, language: str = ENGLISH) -> str:
+    """
+    Constructs and returns a string by randomly selecting a specified number of words
+    from the shared word corpus, separating the selected words with spaces.
+
+    The corpus is indexed once and only re-read when "words.txt" changes on disk,
+    so a reset does not read the whole file again. When a compiled word pool
+    ("assets/words.pool", built by wordpool.py) exists and is up to date, words are
+    drawn from it instead, which needs no parsing at startup and supports filtering
+    by length and difficulty; the filters are ignored without it, and when fewer than
+    k words match them (see filters_match()). Words of other
+    languages are drawn uniformly from their own word list, ignoring the adaptive
+    mode and the filters, and returned in Unicode normalisation form NFC.
+
+    :param k: An integer representing the number of words to randomly pick from
+        the list. Default value is 10.
+    :param adaptive: Whether to favour words containing the bigrams the user types
+        slowly or mistypes often, instead of picking words uniformly.
+    :param lengths: Minimum and maximum number of letters of the words, or None for any length.
+    :param max_level: Maximum difficulty level of the words (0 for home row heavy
+        words), or None for any difficulty.
+    :param language: The language of the words, one of the keys of LANGUAGES.
+    :raises FileNotFoundError: If the word list of the language cannot be found.
+    :return: A string composed of randomly selected words joined by spaces.
+    """
+    if language != ENGLISH:
+        return unicodedata.normalize("NFC", " ".join(language_corpus(language).sample(k)))
+    if adaptive:
+        return " ".join(ADAPTIVE_SAMPLER.sample(k))
+    if pool_is_current():
+        if not filters_match(lengths, max_level, k):
+            lengths = max_level = None
+        min_length, max_length = lengths or (1, MAX_LENGTH)
+        return " ".join(WORD_POOL.sample(k, min_length, max_length,
+                                         DIFFICULTY_LEVELS - 1 if max_level is None else max_level))
+    return " ".join(WORD_CORPUS.sample(k))